@@ -113,6 +113,62 @@ def _check_and_add_sync_columns(app):
             logger.error(f"An error occurred during schema migration check: {e}", exc_info=True)
 
 
+# Stored procedures backing the job concurrency lock. A session-owned
+# sp_getapplock makes the "is another job running?" check a lock-manager
+# lookup instead of a scan of job_config, and is shared safely by every
+# worker process. The is_running flag is still maintained for the dashboard.
+JOB_LOCK_PROCEDURES = {
+    'sp_job_acquire_lock': """
+        CREATE OR ALTER PROCEDURE dbo.sp_job_acquire_lock @job_id NVARCHAR(255)
+        AS
+        BEGIN
+            SET NOCOUNT ON;
+            DECLARE @lock_result INT, @running_job_id NVARCHAR(255), @running_job_name NVARCHAR(255);
+            EXEC @lock_result = sp_getapplock @Resource = 'job_runner', @LockMode = 'Exclusive',
+                                              @LockOwner = 'Session', @LockTimeout = 0;
+            IF @lock_result < 0
+            BEGIN
+                SELECT TOP 1 @running_job_id = job_id, @running_job_name = name
+                FROM dbo.job_config WHERE is_running = 1;
+                SELECT CAST(0 AS BIT) AS lock_acquired, @running_job_id AS running_job_id, @running_job_name AS running_job_name;
+                RETURN;
+            END
+            UPDATE dbo.job_config SET is_running = 1, cancellation_requested = 0 WHERE job_id = @job_id;
+            SELECT CAST(1 AS BIT) AS lock_acquired, @running_job_id AS running_job_id, @running_job_name AS running_job_name;
+        END
+    """,
+    'sp_job_release_lock': """
+        CREATE OR ALTER PROCEDURE dbo.sp_job_release_lock @job_id NVARCHAR(255)
+        AS
+        BEGIN
+            SET NOCOUNT ON;
+            UPDATE dbo.job_config SET is_running = 0 WHERE job_id = @job_id;
+            IF APPLOCK_MODE('public', 'job_runner', 'Session') <> 'NoLock'
+                EXEC sp_releaseapplock @Resource = 'job_runner', @LockOwner = 'Session';
+        END
+    """,
+}
+
+def _create_job_lock_procedures(app):
+    """
+    Creates or updates the stored procedures used by the scheduler's job lock.
+    This is idempotent and runs on every startup.
+    """
+    with app.app_context():
+        logger = logging.getLogger('app.migrator')
+        if db.engine.dialect.name != 'mssql':
+            logger.warning(f"Skipping job lock procedures: not supported on '{db.engine.dialect.name}'. Jobs will lock through the is_running flag instead.")
+            return
+
+        for proc_name, create_sql in JOB_LOCK_PROCEDURES.items():
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(text(create_sql))
+                logger.debug(f"Stored procedure 'dbo.{proc_name}' created or verified.")
+            except SQLAlchemyError as e:
+                logger.error(f"Failed to create stored procedure 'dbo.{proc_name}': {e}")
+
+
 def _seed_manual_mappings(app):
     """
     Checks for and seeds manual mappings if they don't exist.
@@ -171,6 +227,7 @@ def create_app(config_name='development'):
         app.logger.info("Application-specific tables created or verified in the target database.")
 
         _check_and_add_sync_columns(app)
+        _create_job_lock_procedures(app)
         _seed_manual_mappings(app)
 
         from .routes import main_bp
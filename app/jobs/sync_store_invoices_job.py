@@ -53,10 +53,12 @@ def _build_invoice_payload(header_data, items_data, asanito_service, api_client,
     default_warehouse_id = int(get_mapping('Defaults', 'HostWarehouseID', fail_on_not_found=True))
     bank_account_id = _get_default_bank_account_id(api_client, organization_id, cache['bank_accounts'])
 
+    product_records = ServiceRepository.find_many_by('serviceVid', [item_row['ProducVtID'] for item_row in items_data])
+
     invoice_items = []
     for item_row in items_data:
         product_vid = item_row['ProducVtID']
-        product_record = ServiceRepository.find_by(serviceVid=product_vid)
+        product_record = product_records.get(product_vid)
         if not product_record or not product_record.get('serviceAid'):
             raise ValueError(f"Dependency not met for item '{item_row.get('Title')}': Product for ProducVtID '{product_vid}' has not been synced (missing serviceAid).")
         asanito_product_id = product_record['serviceAid']
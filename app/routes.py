@@ -160,11 +160,12 @@ def update_schedule(job_id):
     return redirect(url_for('main.index'))
 
 # --- LIVE LOG STREAMING ROUTES ---
-def run_job_with_streaming_log(job_id, app, log_queue):
+# Records buffered per live-log stream. Past this, QueueHandler drops records
+# rather than letting a slow or disconnected client grow the queue unbounded.
+LOG_STREAM_MAX_QUEUED = 5000
+
+def run_job_with_streaming_log(job_id, app, handler):
     with app.app_context():
-        handler = QueueHandler(log_queue)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
         root_logger = logging.getLogger()
         root_logger.addHandler(handler)
         try:
@@ -175,8 +176,13 @@ def run_job_with_streaming_log(job_id, app, log_queue):
         except Exception as e:
             root_logger.error(f"Exception during manual run of job '{job_id}': {e}", exc_info=True)
         finally:
-            log_queue.put("---LOG-END---")
             root_logger.removeHandler(handler)
+            try:
+                # A live client drains the queue quickly; if it has gone away,
+                # don't hang this thread on a full queue.
+                handler.log_queue.put("---LOG-END---", timeout=10)
+            except queue.Full:
+                pass
 
 @main_bp.route('/log/<job_id>')
 def live_log_page(job_id):
@@ -188,21 +194,26 @@ def live_log_page(job_id):
 
 @main_bp.route('/stream-log/<job_id>')
 def stream_log(job_id):
-    log_queue = queue.Queue()
+    log_queue = queue.Queue(maxsize=LOG_STREAM_MAX_QUEUED)
+    handler = QueueHandler(log_queue)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
     app = current_app._get_current_object()
-    thread = Thread(target=run_job_with_streaming_log, args=(job_id, app, log_queue))
+    thread = Thread(target=run_job_with_streaming_log, args=(job_id, app, handler))
     thread.start()
     @stream_with_context
     def generate():
         while True:
             try:
-                message = log_queue.get(timeout=10)
-                if message == "---LOG-END---": break
-                yield f'data: {message}\n\n'
+                record = log_queue.get(timeout=10)
+                if record == "---LOG-END---": break
+                # Records are formatted here, once per delivered message.
+                yield f'data: {handler.format(record)}\n\n'
             except queue.Empty:
                 if not thread.is_alive(): break
                 continue
         thread.join()
+        if handler.dropped_count:
+            yield f'data: [{handler.dropped_count} log lines were dropped because the stream fell behind]\n\n'
         final_log = SyncLog.query.filter_by(job_id=job_id).order_by(SyncLog.timestamp.desc()).first()
         status = final_log.status if final_log else 'UNKNOWN'
         yield f'event: status\ndata: {status}\n\n'
@@ -3,9 +3,13 @@ import requests
 import logging
 import json
 from urllib.parse import urlencode
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
+# Keep-alive connections each client holds open to the Asanito host.
+HTTP_POOL_MAXSIZE = 20
+
 class AsanitoHttpClient:
     """
     A robust, synchronous HTTP client for making authenticated calls to the Asanito API.
@@ -16,6 +20,8 @@ class AsanitoHttpClient:
     - Detailed logging of requests and responses for easy debugging.
     - Graceful handling of network errors and non-JSON responses.
     - A standardized response format.
+    - Connection reuse: requests go through one pooled requests.Session, so
+      TLS handshakes are paid once per connection rather than once per call.
     """
 
     def __init__(self, asanito_service, job_id="DataSyncJob"):
@@ -29,6 +35,11 @@ class AsanitoHttpClient:
         self.service = asanito_service
         self.log_prefix = f"AsanitoClient ({job_id})"
 
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_MAXSIZE)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
     def request(self, method, endpoint_template, path_params=None, query_params=None, body_payload=None, timeout=90.0):
         """
         Makes an authenticated request to the Asanito API.
@@ -117,7 +128,7 @@ class AsanitoHttpClient:
 
         headers = self.service._get_authenticated_headers()
         
-        response = requests.request(
+        response = self._session.request(
             method=method,
             url=url,
             json=payload,
@@ -8,6 +8,9 @@ from .mapping_service import get_mapping
 
 logger = logging.getLogger(__name__)
 
+# Max values per IN (...) lookup in find_many_by; keeps well under MSSQL's 2100-parameter limit.
+IN_LOOKUP_CHUNK_SIZE = 1000
+
 class BaseRepository:
     """
     A generic base class for interacting with a specific database table.
@@ -88,6 +91,21 @@ class BaseRepository:
         results = cls.where(limit=1, order_by='idd DESC', **kwargs)
         return results[0] if results else None
 
+    @classmethod
+    def find_many_by(cls, field, values):
+        """
+        Batch form of find_by for a single field: returns {value: record} holding
+        the most recent record (highest idd) for each of the given values.
+        Values with no matching record are absent from the result.
+        """
+        unique_values = list(dict.fromkeys(v for v in values if v is not None))
+        records = {}
+        for start in range(0, len(unique_values), IN_LOOKUP_CHUNK_SIZE):
+            chunk = unique_values[start:start + IN_LOOKUP_CHUNK_SIZE]
+            for row in cls.where(order_by='idd DESC', **{f'{field}__in': chunk}):
+                records.setdefault(row[field], row)
+        return records
+
     @classmethod
     def where(cls, limit=None, order_by=None, **kwargs):
         """Finds all records matching the given criteria, with optional ordering."""
@@ -106,7 +124,13 @@ class BaseRepository:
         raise NotImplementedError(f"get_pending_filter not implemented for {cls.__name__}")
 
     @classmethod
-    def find_work_units(cls, limit=None):
+    def find_work_units(cls, limit=None, min_idd=None):
+        """
+        Returns up to `limit` work units built from the table's pending groups.
+        `min_idd` restricts them to records with idd >= min_idd and takes
+        precedence over the table's MinimumIddFilter mapping; 0 reads every
+        pending record regardless of the mapping.
+        """
         logger.info(f"Finding work units in {cls.__table_name__} based on fetchStatus...")
         grouping_key = cls.get_grouping_key()
         
@@ -117,20 +141,26 @@ class BaseRepository:
         query_params = {}
         idd_filter_clause = ""
 
-        try:
-            # Table name in the mapping is the short name (e.g., 'membership')
-            table_short_name = cls.__table_name__.split('.')[-1]
-            min_idd_filter_str = get_mapping('MinimumIddFilter', table_short_name)
-            
-            if min_idd_filter_str and min_idd_filter_str.isdigit():
-                min_idd_filter_val = int(min_idd_filter_str)
-                logger.warning(f"Applying Minimum IDD filter for '{cls.__table_name__}': Processing only records where idd >= {min_idd_filter_val}.")
-                idd_filter_clause = "AND T1.idd >= :min_idd"
-                query_params['min_idd'] = min_idd_filter_val
-            elif min_idd_filter_str:
-                logger.error(f"Invalid Minimum IDD filter value '{min_idd_filter_str}' for table '{table_short_name}'. Must be a number. Ignoring filter.")
-        except Exception as e:
-            logger.error(f"Could not retrieve Minimum IDD filter setting. Proceeding without it. Error: {e}", exc_info=True)
+        if min_idd is not None:
+            # An explicit 0 turns the filter off rather than adding "idd >= 0".
+            min_idd_filter_val = int(min_idd) or None
+        else:
+            try:
+                # Table name in the mapping is the short name (e.g., 'membership')
+                table_short_name = cls.__table_name__.split('.')[-1]
+                min_idd_filter_str = get_mapping('MinimumIddFilter', table_short_name)
+
+                if min_idd_filter_str and min_idd_filter_str.isdigit():
+                    min_idd_filter_val = int(min_idd_filter_str)
+                elif min_idd_filter_str:
+                    logger.error(f"Invalid Minimum IDD filter value '{min_idd_filter_str}' for table '{table_short_name}'. Must be a number. Ignoring filter.")
+            except Exception as e:
+                logger.error(f"Could not retrieve Minimum IDD filter setting. Proceeding without it. Error: {e}", exc_info=True)
+
+        if min_idd_filter_val is not None:
+            logger.warning(f"Applying Minimum IDD filter for '{cls.__table_name__}': Processing only records where idd >= {min_idd_filter_val}.")
+            idd_filter_clause = "AND T1.idd >= :min_idd"
+            query_params['min_idd'] = min_idd_filter_val
         # --- END OF NEW CODE ---
 
         # Define a batch size for how many groups to process per run.
@@ -2,12 +2,22 @@
 # start of app/services/deal_service.py
 # app/services/deal_service.py
 import logging
+import time
 from app import db
 from app.models import DealTriggerProduct, InvoiceDealLink
 from app.services.mapping_service import get_mapping, MappingNotFoundError
 
 logger = logging.getLogger(__name__)
 
+# Trigger product IDs are re-read at most every TRIGGER_IDS_CACHE_TTL seconds.
+# The cache is per process: save_deal_trigger_products only drops the copy in
+# the worker that handled the save, so job_wrapper also clears it at the start
+# of every job run. Within a run, a save made through another gunicorn worker
+# can go unnoticed for up to the TTL.
+TRIGGER_IDS_CACHE_TTL = 60
+# (expires_at, frozenset of asanito_product_id) or None
+_trigger_ids_cache = None
+
 def get_asanito_products(api_client, search_term=None, page=1, per_page=20):
     """
     Fetches a paginated list of products from the Asanito API using the correct payload keys.
@@ -61,16 +71,29 @@ def get_deal_trigger_products():
         return []
     
 def get_deal_trigger_product_ids():
+    """Returns a frozenset of the Asanito product IDs that trigger deal creation."""
+    global _trigger_ids_cache
+    now = time.monotonic()
+    if _trigger_ids_cache and _trigger_ids_cache[0] > now:
+        return _trigger_ids_cache[1]
     try:
         results = db.session.query(DealTriggerProduct.asanito_product_id).all()
-        return {item[0] for item in results}
     except Exception as e:
         logger.error(f"Error fetching deal trigger product IDs from database: {e}", exc_info=True)
-        return set()
+        return frozenset()
+    product_ids = frozenset(item[0] for item in results)
+    _trigger_ids_cache = (now + TRIGGER_IDS_CACHE_TTL, product_ids)
+    return product_ids
+
+def invalidate_trigger_ids():
+    """Drops this process's cached trigger product IDs."""
+    global _trigger_ids_cache
+    _trigger_ids_cache = None
 
-def save_deal_trigger_products(products_to_save):
+def save_deal_trigger_products(products_to_save, commit=True):
     """
     Saves the list of trigger products, including their per-product funnel IDs.
+    With commit=False the changes are only flushed into the caller's transaction.
     """
     logger.info(f"Saving {len(products_to_save)} products to the deal trigger list.")
     try:
@@ -105,12 +128,19 @@ def save_deal_trigger_products(products_to_save):
             )
             db.session.add(new_trigger)
             
-        db.session.commit()
-        logger.info("Successfully committed new deal trigger product list to the database.")
+        if commit:
+            db.session.commit()
+            logger.info("Successfully committed new deal trigger product list to the database.")
+        else:
+            db.session.flush()
     except Exception as e:
         logger.error(f"Error saving deal trigger products: {e}", exc_info=True)
         db.session.rollback()
         raise
+    finally:
+        # Also covers a commit=False save whose caller rolls back afterwards:
+        # the next read simply goes back to the database.
+        invalidate_trigger_ids()
 
 
 def create_deal_for_invoice_item(api_client, invoice_header, invoice_item, asanito_person_id, asanito_product_id, asanito_owner_user_id, source_item_pk):
@@ -3,12 +3,31 @@
 # start of app/services/mapping_service.py
 # app/services/mapping_service.py
 import logging
+import time
+from sqlalchemy import select
+from sqlalchemy.orm import raiseload
 from .source_db_service import execute_query
 from app.models import Mapping
 from app import db
 
 logger = logging.getLogger(__name__)
 
+# Max source IDs per IN (...) lookup in save_mappings.
+SAVE_LOOKUP_CHUNK_SIZE = 1000
+
+# get_mapping results (misses included) are reused for up to this many
+# seconds. The cache is per process: save_mappings only invalidates the copy
+# in the worker that handled the save, and the other gunicorn workers keep
+# their entries. job_wrapper therefore clears the cache at the start of every
+# job run, so each run starts from the committed settings (DealCreationEnabled,
+# MinimumIddFilter, ...); within a run a save made by another worker can go
+# unnoticed for up to the TTL. Anything that edits Mapping rows directly must
+# call invalidate() after committing.
+MAPPING_CACHE_TTL = 60
+MAPPING_CACHE_MAXSIZE = 1024
+# {(map_type, source_id): (expires_at, asanito_id)}
+_MAPPING_CACHE = {}
+
 class MappingNotFoundError(Exception):
     """Custom exception for when a required mapping is not found."""
     pass
@@ -18,43 +37,104 @@ def get_mapping(map_type, source_id, fail_on_not_found=False):
     Retrieves a single mapping from the local database.
     Returns the Asanito ID string or None.
     If fail_on_not_found is True, raises MappingNotFoundError.
+    Results (including misses) are cached for MAPPING_CACHE_TTL seconds.
     """
     # Attempt to get the mapping. Make sure to handle potential None source_id.
     if source_id is None:
         if fail_on_not_found:
             raise MappingNotFoundError(f"Cannot get mapping for type '{map_type}' with a NULL source ID.")
         return None
-        
-    mapping = Mapping.query.filter_by(map_type=map_type, source_id=str(source_id)).first()
-    if mapping:
-        return mapping.asanito_id
+
+    cache_key = (map_type, str(source_id))
+    now = time.monotonic()
+    cached = _MAPPING_CACHE.get(cache_key)
+    if cached and cached[0] > now:
+        asanito_id = cached[1]
+    else:
+        mapping = Mapping.query.options(raiseload('*')).filter_by(map_type=map_type, source_id=cache_key[1]).first()
+        asanito_id = mapping.asanito_id if mapping else None
+        if len(_MAPPING_CACHE) >= MAPPING_CACHE_MAXSIZE:
+            _MAPPING_CACHE.clear()
+        _MAPPING_CACHE[cache_key] = (now + MAPPING_CACHE_TTL, asanito_id)
+
+    if asanito_id is not None:
+        return asanito_id
     
     if fail_on_not_found:
         raise MappingNotFoundError(f"No mapping found for type '{map_type}' with source ID '{source_id}'.")
     
     return None
 
+def invalidate(map_type=None, source_id=None):
+    """
+    Drops cached get_mapping results for one key, for every key of a map type,
+    or everything when called without arguments.
+    """
+    if map_type is None:
+        _MAPPING_CACHE.clear()
+    elif source_id is not None:
+        _MAPPING_CACHE.pop((map_type, str(source_id)), None)
+    else:
+        for key in list(_MAPPING_CACHE):
+            if key[0] == map_type:
+                _MAPPING_CACHE.pop(key, None)
+
 def get_all_mappings(map_type):
     """Returns a dictionary of all saved mappings for a given type."""
-    mappings = Mapping.query.filter_by(map_type=map_type).all()
-    # Returns a dict of {source_id: mapping_object} for easy lookup
-    return {m.source_id: m.to_dict() for m in mappings}
+    # A column-only Core select: the rows are serialized straight away, so
+    # building ORM objects just to call to_dict() on them is wasted work.
+    query = select(
+        Mapping.map_type, Mapping.source_id, Mapping.source_name, Mapping.asanito_id
+    ).where(Mapping.map_type == map_type)
+    rows = db.session.execute(query).mappings().all()
+    # Returns a dict of {source_id: mapping_dict} for easy lookup
+    return {row['source_id']: dict(row) for row in rows}
+
+# {'dbo.table': {'column', ...}} read from INFORMATION_SCHEMA (lower-cased);
+# the identifier whitelist for the SQL that discover_values builds. It is
+# reloaded whenever a lookup misses, so tables and columns added to the source
+# database after the first discovery are picked up without a restart.
+_SOURCE_COLUMNS = None
+
+def _get_source_columns(refresh=False):
+    """Loads and caches the column names of every table in the source database."""
+    global _SOURCE_COLUMNS
+    if _SOURCE_COLUMNS is None or refresh:
+        rows = execute_query("SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS")
+        columns = {}
+        for row in rows:
+            table_key = f"{row['TABLE_SCHEMA']}.{row['TABLE_NAME']}".lower()
+            columns.setdefault(table_key, set()).add(row['COLUMN_NAME'].lower())
+        _SOURCE_COLUMNS = columns
+    return _SOURCE_COLUMNS
+
+def _find_unknown_identifier(source_columns, table, columns):
+    """Returns an error message for the first table or column missing from source_columns, else None."""
+    table_columns = source_columns.get(table.lower())
+    if table_columns is None:
+        return f"Table '{table}' does not exist in the source database."
+    for col in columns:
+        if col.lower() not in table_columns:
+            return f"Column '{col}' does not exist in table '{table}'."
+    return None
 
-def discover_values(config):
+def _build_discovery_query(source_tables_config):
     """
-    Discovers unique values for a given mapping type from the source database.
-    Can now query across multiple tables/columns using a UNION statement.
+    Builds the UNION ALL discovery query for a source_tables config, after checking
+    every table and column against the INFORMATION_SCHEMA whitelist.
+    Raises ValueError for identifiers that don't exist in the source database.
     """
-    source_tables_config = config.get('source_tables')
-    if not source_tables_config:
-        logger.warning(f"No 'source_tables' configured for mapping type '{config.get('display_name')}'. Cannot discover values.")
-        return []
-
+    source_columns = _get_source_columns()
     union_queries = []
-    for source_info in source_tables_config:
-        table = source_info['table']
-        id_col = source_info['id_col']
-        name_col = source_info.get('name_col')
+    for source in source_tables_config:
+        table, id_col, name_col = source['table'], source['id_col'], source.get('name_col')
+        columns = [col for col in (id_col, name_col) if col]
+        if _find_unknown_identifier(source_columns, table, columns):
+            # The whitelist may predate a schema change; reload it once before rejecting.
+            source_columns = _get_source_columns(refresh=True)
+            error = _find_unknown_identifier(source_columns, table, columns)
+            if error:
+                raise ValueError(error)
 
         # Use id_col as name_col if name_col is not provided
         name_col_sql = f"[{name_col}]" if name_col else f"CAST([{id_col}] AS NVARCHAR(255))"
@@ -68,8 +148,20 @@ def discover_values(config):
         )
         union_queries.append(query_part)
 
-    # Combine all parts with UNION
-    full_query = " UNION ".join(union_queries)
+    # Duplicates across parts are collapsed in Python, so UNION ALL avoids a server-side sort.
+    return " UNION ALL ".join(union_queries)
+
+def discover_values(config):
+    """
+    Discovers unique values for a given mapping type from the source database.
+    Can now query across multiple tables/columns using a UNION statement.
+    """
+    source_tables_config = config.get('source_tables')
+    if not source_tables_config:
+        logger.warning(f"No 'source_tables' configured for mapping type '{config.get('display_name')}'. Cannot discover values.")
+        return []
+
+    full_query = _build_discovery_query(source_tables_config)
     
     logger.info(f"Discovering mapping values with combined query: {full_query}")
     results = execute_query(full_query)
@@ -79,7 +171,7 @@ def discover_values(config):
         # The query aliases ensure consistent key names 'source_id' and 'source_name'
         source_id = str(row['source_id'])
         source_name = row.get('source_name')
-        # We use a dictionary to automatically handle duplicates from the UNION
+        # We use a dictionary to automatically handle duplicates across the UNION ALL parts
         if source_id not in discovered:
             discovered[source_id] = {
                 'source_id': source_id,
@@ -98,8 +190,19 @@ def save_mappings(map_type, mappings_to_save):
     if not isinstance(mappings_to_save, list):
         raise TypeError("mappings_to_save must be a list of dictionaries.")
     
-    # Get all existing mappings for this type for efficient lookup
-    existing_mappings = {m.source_id: m for m in Mapping.query.filter_by(map_type=map_type).all()}
+    if not mappings_to_save:
+        return 0
+
+    # Load only the existing mappings this save touches, in IN-clause chunks
+    # that stay well under MSSQL's 2100-parameter limit.
+    input_ids = sorted({str(item['source_id']) for item in mappings_to_save if item.get('source_id')})
+    existing_mappings = {}
+    for start in range(0, len(input_ids), SAVE_LOOKUP_CHUNK_SIZE):
+        chunk = input_ids[start:start + SAVE_LOOKUP_CHUNK_SIZE]
+        query = Mapping.query.options(raiseload('*')).filter(
+            Mapping.map_type == map_type, Mapping.source_id.in_(chunk)
+        )
+        existing_mappings.update({m.source_id: m for m in query.all()})
     
     saved_count = 0
     deleted_count = 0
@@ -111,7 +214,7 @@ def save_mappings(map_type, mappings_to_save):
         if not source_id:
             continue
 
-        existing_obj = existing_mappings.get(source_id)
+        existing_obj = existing_mappings.get(str(source_id))
 
         if asanito_id:  # If a value is provided, we perform an upsert (update or insert)
             if existing_obj:
@@ -134,6 +237,8 @@ def save_mappings(map_type, mappings_to_save):
                 deleted_count += 1
     
     db.session.commit()
+    for source_id in input_ids:
+        invalidate(map_type, source_id)
     logger.info(f"Saved/Updated {saved_count} and deleted {deleted_count} mappings for type '{map_type}'.")
     return saved_count + deleted_count
 # end of app/services/mapping_service.py
\ No newline at end of file
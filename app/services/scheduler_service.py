@@ -2,14 +2,63 @@
 # app/services/scheduler_service.py
 import os
 import importlib
+import importlib.util
 import logging
 from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import update
 
 from app.models import JobConfig
 from app import db, scheduler
+from app.services import deal_service, mapping_service
 
 logger = logging.getLogger(__name__)
 
+# Discovered JOB_CONFIG lists keyed by (jobs_dir, newest job file mtime), so
+# repeated create_app()/reload calls skip the filesystem scan and imports.
+_DISCOVERY_CACHE = {}
+
+
+def _acquire_job_lock(connection, job_id):
+    """
+    Takes the global job lock for job_id on the given connection.
+    Returns (acquired, running_job_id, running_job_name); the running job is
+    only known when the lock is held by someone else.
+    """
+    if connection.dialect.name == 'mssql':
+        lock_result = connection.execute(
+            db.text("EXEC dbo.sp_job_acquire_lock :job_id"), {'job_id': job_id}
+        ).first()
+        connection.commit()
+        return bool(lock_result.lock_acquired), lock_result.running_job_id, lock_result.running_job_name
+
+    # The lock procedures only exist on MSSQL (see _create_job_lock_procedures),
+    # so other databases fall back to the is_running flag, checked and set in
+    # one transaction.
+    running_job = connection.execute(
+        db.text("SELECT job_id, name FROM dbo.job_config WHERE is_running = 1")
+    ).first()
+    if running_job:
+        connection.rollback()
+        return False, running_job.job_id, running_job.name
+    connection.execute(
+        db.text("UPDATE dbo.job_config SET is_running = 1, cancellation_requested = 0 WHERE job_id = :job_id"),
+        {'job_id': job_id}
+    )
+    connection.commit()
+    return True, None, None
+
+
+def _release_job_lock(connection, job_id):
+    """Releases the lock taken by _acquire_job_lock on the same connection."""
+    if connection.dialect.name == 'mssql':
+        connection.execute(db.text("EXEC dbo.sp_job_release_lock :job_id"), {'job_id': job_id})
+    else:
+        connection.execute(
+            db.text("UPDATE dbo.job_config SET is_running = 0 WHERE job_id = :job_id"),
+            {'job_id': job_id}
+        )
+    connection.commit()
+
 
 def job_wrapper(job_id, job_path_str):
     """
@@ -18,48 +67,96 @@ def job_wrapper(job_id, job_path_str):
     This is the entry point for all scheduled job executions.
     """
     with scheduler.app.app_context():
-        # --- ACQUIRE LOCK ---
-        # Use a transaction to check for a running job and acquire the lock atomically.
-        with db.engine.connect() as connection:
-            with connection.begin(): # Start a transaction
-                running_job_result = connection.execute(
-                    db.text("SELECT job_id, name FROM dbo.job_config WHERE is_running = 1")
-                ).first()
-
-                if running_job_result:
-                    running_job_id, running_job_name = running_job_result
-                    logger.warning(f"Skipping scheduled run of '{job_id}': Job '{running_job_name} ({running_job_id})' is already running.")
-                    return # Exit if another job is running
-
-                # No job is running, so acquire the lock for the current job.
-                # Reset the cancellation flag at the start of a new run.
-                connection.execute(
-                    db.text("UPDATE dbo.job_config SET is_running = 1, cancellation_requested = 0 WHERE job_id = :job_id"),
-                    {'job_id': job_id}
-                )
-        
-        logger.info(f"Lock acquired for job '{job_id}'. Context created for: {job_path_str}")
-        
-        try:
-            # --- EXECUTE THE ACTUAL JOB ---
-            module_path, func_name = job_path_str.rsplit(':', 1)
-            module = importlib.import_module(module_path)
-            job_func = getattr(module, func_name)
-            job_func()
-            logger.info(f"Scheduled job '{job_path_str}' finished successfully.")
+        # On MSSQL the lock is an application lock owned by this connection's
+        # session (see dbo.sp_job_acquire_lock), so the same connection must be
+        # held for the whole run and used to release it. If the process dies,
+        # the session ends and SQL Server drops the lock on its own.
+        with db.engine.connect() as lock_connection:
+            # --- ACQUIRE LOCK ---
+            try:
+                lock_acquired, running_job_id, running_job_name = _acquire_job_lock(lock_connection, job_id)
+            except Exception as e:
+                # The procedure may have taken the lock before the error (e.g.
+                # on the commit). Discarding the connection ends its session,
+                # which makes SQL Server drop any lock it holds; returning it
+                # to the pool would keep the lock alive with no owner.
+                lock_connection.invalidate()
+                logger.error(f"Could not acquire the job lock for '{job_id}': {e}", exc_info=True)
+                return
 
+            if not lock_acquired:
+                # The app lock can be held while the row flags say nothing is
+                # running (load_and_schedule_jobs resets them), so the holder
+                # may be unknown.
+                running_job_id = running_job_id or job_id
+                logger.warning(f"Skipping scheduled run of '{job_id}': Job '{running_job_name or running_job_id} ({running_job_id})' is already running.")
+                return # Exit if another job is running
+            
+            logger.info(f"Lock acquired for job '{job_id}'. Context created for: {job_path_str}")
+
+            # Lookup caches are per process and may hold values another worker
+            # has since changed; every run starts from the database.
+            mapping_service.invalidate()
+            deal_service.invalidate_trigger_ids()
+            
+            try:
+                # --- EXECUTE THE ACTUAL JOB ---
+                module_path, func_name = job_path_str.rsplit(':', 1)
+                module = importlib.import_module(module_path)
+                job_func = getattr(module, func_name)
+                job_func()
+                logger.info(f"Scheduled job '{job_path_str}' finished successfully.")
+
+            except Exception as e:
+                logger.error(f"Exception during execution of job '{job_path_str}': {e}", exc_info=True)
+            finally:
+                # --- RELEASE LOCK ---
+                # This block *always* runs, even if the job crashes, ensuring the lock is released.
+                try:
+                    _release_job_lock(lock_connection, job_id)
+                    logger.info(f"Lock released for job: {job_id}")
+                except Exception as e:
+                    # Same as above: close the session so the app lock goes with
+                    # it. On other databases the is_running flag stays set until
+                    # load_and_schedule_jobs resets it.
+                    lock_connection.invalidate()
+                    logger.error(f"Could not release the job lock for '{job_id}': {e}", exc_info=True)
+
+
+def _discover_jobs(jobs_dir):
+    """
+    Returns the JOB_CONFIG of every '*_job.py' module in jobs_dir.
+    Results are cached until a job file is added, removed or modified.
+    """
+    job_files = sorted(f for f in os.listdir(jobs_dir) if f.endswith('_job.py') and not f.startswith('__'))
+    newest_mtime = max((os.path.getmtime(os.path.join(jobs_dir, f)) for f in job_files), default=0.0)
+    cache_key = (jobs_dir, newest_mtime, tuple(job_files))
+    if cache_key in _DISCOVERY_CACHE:
+        logger.info(f"Using cached job discovery results for: {jobs_dir}")
+        return _DISCOVERY_CACHE[cache_key]
+
+    discovered_jobs = []
+    cacheable = True
+    for filename in job_files:
+        module_name = f"app.jobs.{filename[:-3]}"
+        try:
+            if importlib.util.find_spec(module_name) is None:
+                logger.warning(f"Skipping job from {module_name}: module could not be located.")
+                cacheable = False
+                continue
+            module = importlib.import_module(module_name)
+            if hasattr(module, 'JOB_CONFIG'):
+                discovered_jobs.append(module.JOB_CONFIG)
+            else:
+                logger.warning(f"Skipping job from {module_name}: JOB_CONFIG not found.")
         except Exception as e:
-            logger.error(f"Exception during execution of job '{job_path_str}': {e}", exc_info=True)
-        finally:
-            # --- RELEASE LOCK ---
-            # This block *always* runs, even if the job crashes, ensuring the lock is released.
-            with db.engine.connect() as connection:
-                with connection.begin():
-                    connection.execute(
-                        db.text("UPDATE dbo.job_config SET is_running = 0 WHERE job_id = :job_id"),
-                        {'job_id': job_id}
-                    )
-            logger.info(f"Lock released for job: {job_id}")
+            logger.error(f"Failed to load job from {module_name}: {e}", exc_info=True)
+            cacheable = False
+
+    # Don't let a transient import failure stick until the next file change.
+    if cacheable:
+        _DISCOVERY_CACHE[cache_key] = discovered_jobs
+    return discovered_jobs
 
 
 def load_and_schedule_jobs(app, scheduler):
@@ -70,30 +167,26 @@ def load_and_schedule_jobs(app, scheduler):
     jobs_dir = os.path.join(app.root_path, 'jobs')
     logger.info(f"Searching for jobs in: {jobs_dir}")
 
-    discovered_jobs = []
-    for filename in os.listdir(jobs_dir):
-        if filename.endswith('_job.py') and not filename.startswith('__'):
-            module_name = f"app.jobs.{filename[:-3]}"
-            try:
-                module = importlib.import_module(module_name)
-                if hasattr(module, 'JOB_CONFIG'):
-                    discovered_jobs.append(module.JOB_CONFIG)
-                else:
-                    logger.warning(f"Skipping job from {module_name}: JOB_CONFIG not found.")
-            except Exception as e:
-                logger.error(f"Failed to load job from {module_name}: {e}", exc_info=True)
+    discovered_jobs = _discover_jobs(jobs_dir)
 
     with app.app_context():
         # On application startup, reset any stale running flags. This handles cases
         # where the application was terminated abruptly without releasing a lock.
         logger.info("Resetting all 'is_running' flags on scheduler startup.")
-        JobConfig.query.update({JobConfig.is_running: False, JobConfig.cancellation_requested: False})
+        # The reset returns the updated rows (UPDATE ... OUTPUT INSERTED.* on MSSQL),
+        # so the configs are loaded in the same round-trip as plain row mappings.
+        job_config_table = JobConfig.__table__
+        reset_rows = db.session.execute(
+            update(job_config_table)
+            .values(is_running=False, cancellation_requested=False)
+            .returning(*job_config_table.c)
+        ).mappings().all()
         db.session.commit()
         
         # Get all job IDs currently in the scheduler
         scheduled_job_ids = {job.id for job in scheduler.get_jobs()}
         
-        db_job_configs = {config.job_id: config for config in JobConfig.query.all()}
+        db_job_configs = {row['job_id']: row for row in reset_rows}
         discovered_job_ids = set()
 
         for job_file_config in discovered_jobs:
@@ -108,35 +201,34 @@ def load_and_schedule_jobs(app, scheduler):
                 logger.info(f"New job '{job_id}' discovered. Seeding configuration to database.")
                 trigger_args = {k: v for k, v in job_file_config.items() if k in ['hour', 'minute', 'day_of_week', 'day', 'month']}
                 
-                job_db_config = JobConfig(
-                    job_id=job_id,
-                    name=job_file_config.get('name', job_id),
-                    is_enabled=True,
-                    trigger_type='cron',
-                    trigger_args=trigger_args
-                )
-                db.session.add(job_db_config)
+                job_db_config = {
+                    'job_id': job_id,
+                    'name': job_file_config.get('name', job_id),
+                    'is_enabled': True,
+                    'trigger_args': trigger_args
+                }
+                db.session.add(JobConfig(trigger_type='cron', **job_db_config))
                 db.session.commit()
             
             # Schedule or remove the job based on its 'is_enabled' flag in the DB
-            if job_db_config.is_enabled:
-                logger.info(f"Scheduling job '{job_db_config.name}' with context wrapper.")
-                trigger = CronTrigger(**job_db_config.trigger_args)
+            if job_db_config['is_enabled']:
+                logger.info(f"Scheduling job '{job_db_config['name']}' with context wrapper.")
+                trigger = CronTrigger(**job_db_config['trigger_args'])
                 
                 scheduler.add_job(
-                    id=job_db_config.job_id,
+                    id=job_db_config['job_id'],
                     func=job_wrapper,
-                    args=[job_db_config.job_id, job_file_config['func']],
+                    args=[job_db_config['job_id'], job_file_config['func']],
                     trigger=trigger,
-                    name=job_db_config.name,
+                    name=job_db_config['name'],
                     replace_existing=True
                 )
             else:
-                if scheduler.get_job(job_db_config.job_id):
-                    scheduler.remove_job(job_db_config.job_id)
-                    logger.info(f"Removed disabled job '{job_db_config.name}' from scheduler.")
+                if scheduler.get_job(job_db_config['job_id']):
+                    scheduler.remove_job(job_db_config['job_id'])
+                    logger.info(f"Removed disabled job '{job_db_config['name']}' from scheduler.")
                 else:
-                    logger.info(f"Job '{job_db_config.name}' is disabled. Not scheduling.")
+                    logger.info(f"Job '{job_db_config['name']}' is disabled. Not scheduling.")
 
         # Clean up jobs from scheduler that are no longer in the database or discovered files
         jobs_to_remove = scheduled_job_ids - discovered_job_ids
@@ -28,19 +28,20 @@ def execute_query(query_string: str, params: dict = None):
 
 def execute_write(query_string: str, params: dict = None):
     """
-    Executes a WRITE query (UPDATE, INSERT, DELETE) and commits the transaction.
-    Relies on the existing Flask-SQLAlchemy session management.
+    Executes a WRITE query (UPDATE, INSERT, DELETE) in its own short transaction.
+    Runs on a pooled engine connection rather than the ORM session, so no
+    unit-of-work flush is triggered; engine.begin() commits on success and
+    rolls back on error.
     Returns the number of rows affected.
     """
     try:
         logger.debug(f"Executing write: {query_string} with params: {params}")
         query = text(query_string)
-        result = db.session.execute(query, params)
-        db.session.commit() # Commit the transaction
+        with db.engine.begin() as connection:
+            result = connection.execute(query, params or {})
         logger.info(f"Write operation successful and committed. Rows affected: {result.rowcount}")
         return result.rowcount
     except exc.SQLAlchemyError as e:
         logger.error(f"Error executing write operation on source database: {e}")
-        db.session.rollback() # Rollback on error
         raise
 # end of app/services/source_db_service.py
\ No newline at end of file
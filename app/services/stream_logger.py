@@ -1,16 +1,39 @@
 # app/services/stream_logger.py
+import copy
 import logging
+import queue
 
 class QueueHandler(logging.Handler):
     """
     A logging handler that puts records into a specific queue instance.
     This handler does not create its own queue; it's given one.
+
+    Records are enqueued unformatted; the consumer calls `format()` on the
+    records it actually delivers, so producers never pay for formatting.
     """
     def __init__(self, log_queue, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.log_queue = log_queue
+        self.dropped_count = 0
+
+    def prepare(self, record):
+        """
+        Returns a copy of the record that is safe to hand to another thread.
+        Like the stdlib QueueHandler, the traceback is rendered to text and
+        exc_info is stripped, but the message itself is left unformatted.
+        """
+        record = copy.copy(record)
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
     def emit(self, record):
-        # We only want to stream the formatted message
-        msg = self.format(record)
-        self.log_queue.put(msg)
\ No newline at end of file
+        try:
+            self.log_queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            # Never block the job thread on a slow consumer; drop instead.
+            self.dropped_count += 1
+        except Exception:
+            self.handleError(record)
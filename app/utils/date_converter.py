@@ -3,9 +3,46 @@
 import logging
 import jdatetime
 from datetime import date, datetime
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+_G_DAYS_BEFORE_MONTH = (0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
+_J_DAYS_IN_MONTH = (31, 31, 31, 31, 31, 31, 30, 30, 30, 30, 30, 29)
+
+@lru_cache(maxsize=65536)
+def _g2j(gy, gm, gd):
+    """
+    Converts a Gregorian (year, month, day) to a Jalali (year, month, day) tuple.
+    Same integer algorithm as jdatetime.GregorianToJalali, without building
+    jdatetime objects; cached because dates in a sync batch repeat a lot.
+    """
+    gy -= 1600
+    g_day_no = 365 * gy + (gy + 3) // 4 - (gy + 99) // 100 + (gy + 399) // 400
+    g_day_no += _G_DAYS_BEFORE_MONTH[gm - 1] + gd - 1
+    if gm > 2 and ((gy % 4 == 0 and gy % 100 != 0) or gy % 400 == 0):
+        # leap year and after Feb
+        g_day_no += 1
+
+    j_day_no = g_day_no - 79
+    j_np, j_day_no = divmod(j_day_no, 12053)
+    jy = 979 + 33 * j_np + 4 * (j_day_no // 1461)
+    j_day_no %= 1461
+    if j_day_no >= 366:
+        jy += (j_day_no - 1) // 365
+        j_day_no = (j_day_no - 1) % 365
+
+    jm = 0
+    while jm < 11 and j_day_no >= _J_DAYS_IN_MONTH[jm]:
+        j_day_no -= _J_DAYS_IN_MONTH[jm]
+        jm += 1
+    return jy, jm + 1, j_day_no + 1
+
+def _format_jalali_for_api(dt) -> str:
+    """Formats a Gregorian datetime as the Jalali 'MM_dd_yyyy HH:mm' string."""
+    jy, jm, jd = _g2j(dt.year, dt.month, dt.day)
+    return f"{jm:02d}_{jd:02d}_{jy:04d} {dt.hour:02d}:{dt.minute:02d}"
+
 def convert_date_for_asanito(date_input) -> str | None:
     """
     Converts a date input to a Gregorian ISO 8601 format string,
@@ -67,18 +104,13 @@ def convert_date_for_invoice_api(date_input) -> str | None:
         logger.warning(f"Invalid type for invoice date conversion: {type(date_input)}. Expected str, date, or datetime.")
         return None
 
-    # Step 2: Convert the Gregorian datetime object to its Jalali equivalent.
-    jalali_dt = jdatetime.datetime.fromgregorian(datetime=gregorian_dt)
-    
-    # Step 3: Format the Jalali datetime into the required string format.
-    return jalali_dt.strftime('%m_%d_%Y %H:%M')
+    # Step 2: Convert to Jalali and format it into the required string format.
+    return _format_jalali_for_api(gregorian_dt)
 
 def get_current_jalali_for_status_update() -> str:
     """
     Returns the current date and time in Jalali format 
     as required by the Invoice status update API.
     """
-    now = datetime.now()
-    j_now = jdatetime.datetime.fromgregorian(datetime=now)
     # The API for status updates specifically requires Jalali date.
-    return j_now.strftime('%m_%d_%Y %H:%M')
\ No newline at end of file
+    return _format_jalali_for_api(datetime.now())
\ No newline at end of file
@@ -1,5 +1,6 @@
 # app/utils/persian_tools.py
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +22,7 @@ _PERSIAN_SEPARATORS = {
     1000000000000: "تریلیون",
 }
 
-def _three_digit_to_word(n):
+def _three_digit_compute(n):
     """Converts a number from 0-999 to its Persian word representation."""
     if n < 20:
         return _PERSIAN_WORDS.get(n, "")
@@ -36,9 +37,18 @@ def _three_digit_to_word(n):
         if rem == 0:
             return hundreds_word
         else:
-            return f"{hundreds_word} و {_three_digit_to_word(rem)}"
+            return f"{hundreds_word} و {_three_digit_compute(rem)}"
     return ""
 
+# Precomputed words for 0-999 and separators sorted once at import time,
+# so the per-call path is just table lookups.
+_THREE_DIGIT = tuple(_three_digit_compute(i) for i in range(1000))
+_SORTED_SEPS = tuple(sorted(_PERSIAN_SEPARATORS.items(), reverse=True))
+
+def _three_digit_to_word(n):
+    """Returns the Persian word representation of a number from 0-999."""
+    return _THREE_DIGIT[n] if n < 1000 else ""
+
 def convert_amount_to_persian_word(num):
     """
     Converts a given integer to its Persian word representation.
@@ -51,22 +61,23 @@ def convert_amount_to_persian_word(num):
             logger.warning(f"Cannot convert '{num}' to integer for word conversion.")
             return ""
 
-    num = int(num) # ensure it's an integer
+    return _int_to_persian_word(int(num)) # ensure it's an integer
 
+@lru_cache(maxsize=4096)
+def _int_to_persian_word(num):
+    """Cached worker for convert_amount_to_persian_word; expects an int."""
     if num == 0:
         return _PERSIAN_ZERO
 
     if num < 0:
-        return f"{_PERSIAN_NEGATIVE} {convert_amount_to_persian_word(abs(num))}"
+        return f"{_PERSIAN_NEGATIVE} {_int_to_persian_word(-num)}"
 
     parts = []
-    sorted_separators = sorted(_PERSIAN_SEPARATORS.keys(), reverse=True)
-    
     temp_num = num
-    for sep_val in sorted_separators:
+    for sep_val, sep_word in _SORTED_SEPS:
         if temp_num >= sep_val:
             count, temp_num = divmod(temp_num, sep_val)
-            parts.append(f"{_three_digit_to_word(count)} {_PERSIAN_SEPARATORS[sep_val]}")
+            parts.append(f"{_three_digit_to_word(count)} {sep_word}")
 
     if temp_num > 0:
         parts.append(_three_digit_to_word(temp_num))
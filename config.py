@@ -14,6 +14,25 @@ class Config:
     # The application now uses the main source database for everything.
     SQLALCHEMY_DATABASE_URI = os.environ.get('SOURCE_DATABASE_URI')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Keep a warm pool of connections so scheduled jobs don't re-handshake with
+    # MSSQL on every run, and ping/recycle them so overnight idle connections
+    # that the server has dropped are replaced transparently.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': True,
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_recycle': 1800,
+        'pool_timeout': 30,
+        # The repositories' IN (...) lookups produce one statement string per
+        # list length and table, which overruns the default 500-entry
+        # compiled-statement cache and evicts the hot queries.
+        'query_cache_size': 1200,
+    }
+    # pyodbc's fast_executemany sends an executemany (the UPDATE/DELETE batches
+    # a save_mappings flush produces) as one parameter array instead of a
+    # round-trip per row. The option only exists on the mssql+pyodbc dialect.
+    if (SQLALCHEMY_DATABASE_URI or '').startswith('mssql+pyodbc'):
+        SQLALCHEMY_ENGINE_OPTIONS['fast_executemany'] = True
     
     # Scheduler config
     SCHEDULER_API_ENABLED = True
@@ -0,0 +1,167 @@
+import functools
+import logging
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session, scoped_session
+
+# --- Setup Project Path so we can import from 'app' ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# Transaction-control statements issued for db_session's savepoints (MSSQL and
+# the generic SQL spellings); count_queries leaves them out.
+_SAVEPOINT_PREFIXES = ('SAVE TRANSACTION', 'ROLLBACK TRANSACTION', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def pytest_configure(config):
+    # Registered here too so the marker is known when pytest-xdist is absent.
+    config.addinivalue_line(
+        "markers", "xdist_group(name): keep these tests on one worker under 'pytest -n auto --dist loadgroup'"
+    )
+    # The app and the tests log at INFO; keep that out of the hot path unless
+    # a run asks for it with --log-level / --log-cli-level or caplog.
+    if not config.getoption("log_level") and not config.getoption("log_cli_level"):
+        logging.getLogger().setLevel(logging.WARNING)
+
+
+@functools.lru_cache(maxsize=None)
+def get_app(config_name):
+    """Builds each configuration's app once per process; later calls reuse it."""
+    from app import create_app
+    return create_app(config_name)
+
+
+@pytest.fixture(scope="session")
+def app():
+    """
+    Builds the application against the configured database and keeps its
+    context pushed for the whole session. Integration tests that need the
+    database are skipped when the application cannot be started here.
+    """
+    try:
+        app = get_app('development')
+    except Exception as e:
+        pytest.skip(f"Application could not be started against the configured database: {e}")
+
+    ctx = app.app_context()
+    ctx.push()
+    yield app
+    ctx.pop()
+
+
+@pytest.fixture(scope="session")
+def api_client(app):
+    """One Asanito client, with its auth token and keep-alive connections, for the whole session."""
+    from app.services.asanito_service import AsanitoService
+    from app.services.asanito_http_client import AsanitoHttpClient
+    return AsanitoHttpClient(AsanitoService(), job_id="DealCreationTest")
+
+
+@pytest.fixture
+def mock_asanito(api_client, monkeypatch):
+    """
+    Replaces api_client.request for one test so nothing goes over the network.
+    Register canned replies in .responses keyed by (method, endpoint_template);
+    every call is recorded in .calls as (method, endpoint_template, body_payload).
+    Unregistered endpoints get an error response.
+    """
+    stub = SimpleNamespace(calls=[], responses={})
+
+    def _request(method, endpoint_template, path_params=None, query_params=None, body_payload=None, timeout=90.0):
+        stub.calls.append((method.upper(), endpoint_template, body_payload))
+        return stub.responses.get(
+            (method.upper(), endpoint_template),
+            {"error": f"No mocked response for {method} {endpoint_template}", "status_code": 501}
+        )
+
+    monkeypatch.setattr(api_client, "request", _request)
+    return stub
+
+
+@pytest.fixture(scope="session")
+def connection(app):
+    """One database connection that every db_session test runs its transaction on."""
+    from app import db
+    conn = db.engine.connect()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def db_session(connection):
+    """
+    Runs the test inside a transaction that is rolled back afterwards.
+    db.session is swapped for a session joined to that transaction, so
+    commits made by the code under test only release savepoints and nothing
+    the test writes reaches the database.
+
+    A DBAPI connection can't be shared between threads, so threads the test
+    starts get sessions on their own pooled connections instead; they don't
+    see the test's uncommitted writes and should only read.
+    """
+    from app import db
+    from app.services import deal_service, mapping_service
+
+    test_thread = threading.get_ident()
+
+    def _session_factory():
+        if threading.get_ident() == test_thread:
+            return Session(bind=connection, join_transaction_mode="create_savepoint")
+        return Session(bind=connection.engine)
+
+    # Start from cold in-process caches too, whatever earlier tests left.
+    mapping_service.invalidate()
+    deal_service.invalidate_trigger_ids()
+
+    transaction = connection.begin()
+    session = scoped_session(_session_factory)
+    original_session, db.session = db.session, session
+    try:
+        yield session
+    finally:
+        db.session = original_session
+        session.remove()
+        transaction.rollback()
+        # The in-process caches may hold values that were just rolled back.
+        mapping_service.invalidate()
+        deal_service.invalidate_trigger_ids()
+
+
+@pytest.fixture
+def count_queries(app):
+    """
+    Returns a context manager that collects the SQL statements this thread
+    sends through the app's engine, for asserting an upper bound on queries:
+
+        with count_queries() as queries:
+            ...
+        assert len(queries) <= 3
+    """
+    from app import db
+
+    @contextmanager
+    def _count_queries():
+        statements = []
+        thread_id = threading.get_ident()
+
+        # Listen on the engine rather than one connection: commits inside the
+        # block hand the session a fresh pooled connection. Statements from
+        # scheduler threads, and the savepoints db_session adds, are ignored.
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            if threading.get_ident() == thread_id and not statement.startswith(_SAVEPOINT_PREFIXES):
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _record)
+
+    return _count_queries
@@ -0,0 +1,43 @@
+"""
+Single-statement mapping writes for the tests. The application saves
+mappings through mapping_service.save_mappings; the tests only need to flip
+one setting inside db_session's rolled-back transaction.
+"""
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models import Mapping
+from app.services import mapping_service
+
+_UPSERT_MAPPING_SQL = text("""
+    MERGE dbo.mapping WITH (HOLDLOCK) AS target
+    USING (SELECT :map_type AS map_type, :source_id AS source_id) AS src
+        ON target.map_type = src.map_type AND target.source_id = src.source_id
+    WHEN MATCHED THEN
+        UPDATE SET asanito_id = :asanito_id
+    WHEN NOT MATCHED THEN
+        INSERT (map_type, source_id, source_name, asanito_id)
+        VALUES (:map_type, :source_id, :source_name, :asanito_id);
+""")
+
+
+def upsert_mapping(map_type, source_id, asanito_id, source_name=None):
+    """
+    Creates or updates a single mapping in one statement, without committing.
+    source_name is only used when the mapping is created.
+    The key's cached get_mapping result is dropped straight away, so code
+    under test that reads through the same session sees the new value.
+    """
+    params = {'map_type': map_type, 'source_id': str(source_id), 'source_name': source_name, 'asanito_id': str(asanito_id)}
+    dialect_name = db.session.get_bind().dialect.name
+    if dialect_name == 'mssql':
+        db.session.execute(_UPSERT_MAPPING_SQL, params)
+    elif dialect_name == 'sqlite':
+        stmt = sqlite_insert(Mapping).values(**params).on_conflict_do_update(
+            index_elements=['map_type', 'source_id'], set_={'asanito_id': params['asanito_id']}
+        )
+        db.session.execute(stmt)
+    else:
+        raise NotImplementedError(f"upsert_mapping does not support the '{dialect_name}' dialect.")
+    mapping_service.invalidate(map_type, source_id)
@@ -0,0 +1,45 @@
+# start of tests/seed_data_pools.py
+"""
+Static Persian text used by seed_database.py in place of Faker.
+Sampling from these tuples with random.choice is much cheaper than Faker's
+provider dispatch, and the seed data only needs plausible-looking values.
+"""
+
+FIRST_NAMES_M = (
+    'علی', 'محمد', 'حسین', 'رضا', 'مهدی', 'امیر', 'سعید', 'حمید', 'مجید', 'کامران',
+    'بهزاد', 'فرهاد', 'پویا', 'آرش', 'سینا', 'میلاد', 'بابک', 'کیوان', 'نوید', 'یاسر',
+)
+
+FIRST_NAMES_F = (
+    'زهرا', 'فاطمه', 'مریم', 'سارا', 'نرگس', 'لیلا', 'مینا', 'الهام', 'نازنین', 'هانیه',
+    'شیما', 'پریسا', 'نگار', 'آزاده', 'سمیرا', 'مهسا', 'ترانه', 'یاسمن', 'رویا', 'فرشته',
+)
+
+LAST_NAMES = (
+    'محمدی', 'حسینی', 'احمدی', 'رضایی', 'موسوی', 'کریمی', 'جعفری', 'صادقی', 'رحیمی', 'نوری',
+    'کاظمی', 'قاسمی', 'عباسی', 'مرادی', 'اکبری', 'شریفی', 'یزدانی', 'فراهانی', 'طاهری', 'زمانی',
+)
+
+STREETS = (
+    'تهران، خیابان ولیعصر', 'تهران، خیابان شریعتی', 'تهران، خیابان انقلاب', 'تهران، بلوار کشاورز',
+    'اصفهان، خیابان چهارباغ', 'شیراز، خیابان زند', 'مشهد، بلوار وکیل‌آباد', 'تبریز، خیابان امام',
+    'کرج، بلوار جمهوری', 'رشت، خیابان سعدی', 'قم، خیابان صفاییه', 'یزد، خیابان کاشانی',
+)
+
+SERVICE_WORDS = (
+    'یوگا', 'پیلاتس', 'بدنسازی', 'ایروبیک', 'شنا', 'اسپینینگ', 'کراس‌فیت', 'تی‌آر‌ایکس',
+    'اسپرسو', 'لاته', 'شیک پروتئین', 'حوله', 'قمقمه', 'دستکش', 'ماساژ', 'سونا',
+)
+
+BS_PHRASES = (
+    'بهینه‌سازی فرایندهای فروش', 'یکپارچه‌سازی خدمات مشتریان', 'توسعه راهکارهای نوآورانه',
+    'مدیریت هوشمند منابع', 'ارتقای تجربه کاربری', 'تحلیل داده‌های بازار',
+    'خودکارسازی گزارش‌های مالی', 'بازطراحی زنجیره تامین', 'افزایش بهره‌وری تیم‌ها',
+)
+
+CATCH_PHRASES = (
+    'سلامتی شما، اولویت ما', 'همیشه یک قدم جلوتر', 'کیفیت بی‌نظیر در هر جلسه',
+    'تجربه‌ای متفاوت از ورزش', 'انرژی برای هر روز', 'با ما قوی‌تر باشید',
+    'آرامش و تندرستی', 'بهترین نسخه خودتان باشید', 'خدمات حرفه‌ای با قیمت مناسب',
+)
+# end of tests/seed_data_pools.py
@@ -4,12 +4,21 @@
 import pyodbc
 import uuid
 import random
-from faker import Faker
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import argparse
 import os
+import shutil
+import subprocess
+import tempfile
 from dotenv import load_dotenv
 
+try:
+    from tests import seed_data_pools
+except ImportError: # Run directly as `python tests/seed_database.py`
+    import seed_data_pools
+
 # --- START OF NEW CONNECTION LOGIC ---
 
 # Load environment variables from .env file at the project root
@@ -30,10 +39,12 @@ def build_pyodbc_connection_string_from_env():
     if not all([db_driver, db_server, db_database, db_username, db_password]):
         raise ValueError("FATAL: One or more required DB_* environment variables are missing.")
 
+    # DB_PORT is optional; without it the driver uses the default port.
+    server = f"{db_server},{db_port}" if db_port else db_server
     # This format is robust for special characters in the driver name and password.
     return (
         f"DRIVER={{{db_driver}}};"
-        f"SERVER={db_server},{db_port};"
+        f"SERVER={server};"
         f"DATABASE={db_database};"
         f"UID={db_username};"
         f"PWD={{{db_password}}};"
@@ -47,20 +58,42 @@ CONNECTION_STRING = build_pyodbc_connection_string_from_env()
 # SCRIPT CONFIGURATION
 # ==============================================================================
 NUM_UNIQUE_ENTITIES = 15
-fake = Faker('fa_IR')
+# 'values' (default) sends multi-row INSERT statements over ODBC; 'bcp' stages rows
+# through the bcp bulk-copy utility when it is on the PATH.
+BULK_LOADER = os.environ.get('SEED_BULK_LOADER', 'values').lower()
+# With SEED_BCP_TRUSTED_CONNECTION=1, bcp signs in with -T (Windows/Kerberos auth).
+# Otherwise it is given DB_USERNAME/DB_PASSWORD, and the password shows up in the
+# process list while bcp runs, so prefer trusted auth wherever the server allows it.
+BCP_TRUSTED_CONNECTION = os.environ.get('SEED_BCP_TRUSTED_CONNECTION', '').lower() in ('1', 'true', 'yes')
+# 'static' (default) samples the word lists in seed_data_pools.py; 'faker' pre-draws from Faker instead.
+TEXT_SOURCE = os.environ.get('SEED_TEXT_SOURCE', 'static').lower()
+# Fixed seed so reruns generate the same names, prices and dates (UUIDs stay random).
+# Any string works. It only seeds the generators this script creates (see
+# populator_rng); the process-wide `random` is left alone, because the web app
+# imports this module.
+RANDOM_SEED = os.environ.get('SEED_RANDOM_SEED', '0')
+
+def bulk_uuids(n):
+    """Returns n random version-4 UUIDs cut from a single os.urandom call."""
+    raw = os.urandom(16 * n)
+    return [uuid.UUID(bytes=raw[i:i + 16], version=4) for i in range(0, 16 * n, 16)]
 
 data_pools = {
-    "organizations": [uuid.uuid4() for _ in range(5)],
-    "creator_users": [uuid.uuid4() for _ in range(10)],
-    "services": defaultdict(list), # Stores {service_vid: [list_of_idds]}
-    "memberships": defaultdict(list), # Stores {person_vid: [list_of_member_vids]}
-    "latest_member_vids": {}, # Stores {person_vid: latest_member_vid}
+    "organizations": bulk_uuids(5),
+    "creator_users": bulk_uuids(10),
+    # Flat lists of logical IDs in insertion order, sampled directly by the populators.
+    "service_vids": [],
+    "person_vids": [],
+    "latest_member_vids": {}, # Stores {person_vid: (latest_member_vid, fullname)}
     # --- Data pools reflecting production data for receipts ---
-    "transfer_bank_account_guids": [uuid.uuid4() for _ in range(2)],
+    "transfer_bank_account_guids": bulk_uuids(2),
     "cheque_bank_names": ['بانک سامان', 'بانک پارسیان', 'بانک کارآفرین'],
-    "cash_receive_type_guids": [uuid.uuid4() for _ in range(2)] # GUIDs from ReceiveType column for cash
+    "cash_receive_type_guids": bulk_uuids(2) # GUIDs from ReceiveType column for cash
 }
 
+# Text values the populators sample from; filled once by build_text_pools().
+text_pools = {}
+
 TABLE_NAMES = ['service', 'membership', 'invoiceHed', 'invoiceItem', 'ServiceInvoice', 'receipt']
 
 # --- Table Definitions --- (Unchanged)
@@ -132,9 +165,56 @@ TABLE_DEFINITIONS = {
     """
 }
 
+# --- Post-load Indexes ---
+# Created only after all rows are in, so the bulk load writes to bare heaps.
+# They cover the sync's lookups: idd ordering and the per-table grouping key.
+ADD_INDEXES_SQL = {
+    'service': """
+        ALTER TABLE [dbo].[service] ADD CONSTRAINT [PK_service] PRIMARY KEY CLUSTERED ([idd]);
+        CREATE INDEX [IX_service_serviceVid] ON [dbo].[service] ([serviceVid]) INCLUDE ([fetchStatus]);
+    """,
+    'membership': """
+        ALTER TABLE [dbo].[membership] ADD CONSTRAINT [PK_membership] PRIMARY KEY CLUSTERED ([idd]);
+        CREATE INDEX [IX_membership_personVId] ON [dbo].[membership] ([personVId]) INCLUDE ([fetchStatus]);
+        CREATE INDEX [IX_membership_memberVId] ON [dbo].[membership] ([memberVId]);
+    """,
+    'invoiceHed': """
+        ALTER TABLE [dbo].[invoiceHed] ADD CONSTRAINT [PK_invoiceHed] PRIMARY KEY CLUSTERED ([idd]);
+        CREATE INDEX [IX_invoiceHed_invoiceVID] ON [dbo].[invoiceHed] ([invoiceVID]) INCLUDE ([fetchStatus]);
+    """,
+    'invoiceItem': """
+        ALTER TABLE [dbo].[invoiceItem] ADD CONSTRAINT [PK_invoiceItem] PRIMARY KEY CLUSTERED ([idd]);
+        CREATE INDEX [IX_invoiceItem_itemVID] ON [dbo].[invoiceItem] ([itemVID]) INCLUDE ([fetchStatus]);
+        CREATE INDEX [IX_invoiceItem_invoiceVID] ON [dbo].[invoiceItem] ([invoiceVID]);
+    """,
+    'ServiceInvoice': """
+        ALTER TABLE [dbo].[ServiceInvoice] ADD CONSTRAINT [PK_ServiceInvoice] PRIMARY KEY CLUSTERED ([idd]);
+        CREATE INDEX [IX_ServiceInvoice_id] ON [dbo].[ServiceInvoice] ([id]) INCLUDE ([fetchStatus]);
+    """,
+    'receipt': """
+        ALTER TABLE [dbo].[receipt] ADD CONSTRAINT [PK_receipt] PRIMARY KEY CLUSTERED ([idd]);
+        CREATE INDEX [IX_receipt_vID] ON [dbo].[receipt] ([vID]) INCLUDE ([fetchStatus]);
+    """
+}
+
+# --- Table Types --- (used as table-valued parameters by the populators)
+TABLE_TYPE_DEFINITIONS = {
+    'ReceiptTVP': """
+        CREATE TYPE [dbo].[ReceiptTVP] AS TABLE (
+            [vID] UNIQUEIDENTIFIER NULL, [tarikh] DATE NULL, [personid] UNIQUEIDENTIFIER NULL,
+            [fullname] NVARCHAR(600) NULL, [title] NVARCHAR(804) NULL, [Amount] BIGINT NULL,
+            [modeldaryaft] NVARCHAR(60) NULL, [ReceiveType] UNIQUEIDENTIFIER NULL,
+            [BankName] NVARCHAR(100) NULL, [BankAccount] UNIQUEIDENTIFIER NULL,
+            [ChequeNumber] NVARCHAR(60) NULL, [isChange] BIT NULL
+        );
+    """
+}
+
 def get_db_connection():
     try:
         conn = pyodbc.connect(CONNECTION_STRING, autocommit=False)
+        # Suppress the per-statement row-count messages for the whole session.
+        conn.execute("SET NOCOUNT ON;")
         return conn
     except Exception as e:
         print(f"Error connecting to the database: {e}")
@@ -142,156 +222,370 @@ def get_db_connection():
 
 def drop_existing_tables(cursor):
     print("Dropping existing business data tables...")
-    for table_name in TABLE_NAMES:
-        try:
-            check_query = f"SELECT 1 FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = 'dbo' AND TABLE_NAME = '{table_name}'"
-            if cursor.execute(check_query).fetchone():
-                print(f"  -> Dropping table '{table_name}'...")
-                cursor.execute(f"DROP TABLE dbo.{table_name}")
-                cursor.commit()
-            else:
-                print(f"  -> Table '{table_name}' does not exist. Skipping drop.")
-        except pyodbc.Error as e:
-            print(f"Database error while dropping table {table_name}: {e}")
-            cursor.rollback()
-            raise
+    # DROP ... IF EXISTS (SQL Server 2016+) needs no existence probe, so every drop goes out in one batch.
+    drop_sql = [f"DROP TABLE IF EXISTS dbo.{table_name};" for table_name in TABLE_NAMES]
+    drop_sql += [f"DROP TYPE IF EXISTS dbo.{type_name};" for type_name in TABLE_TYPE_DEFINITIONS]
+    try:
+        print(f"  -> Dropping tables {', '.join(TABLE_NAMES)} and table types {', '.join(TABLE_TYPE_DEFINITIONS)} if they exist...")
+        cursor.execute("\n".join(drop_sql))
+    except pyodbc.Error as e:
+        print(f"Database error while dropping tables: {e}")
+        raise
     print("Finished dropping tables.\n")
 
 def create_tables(cursor):
     print("Creating tables...")
-    for table_name, create_sql in TABLE_DEFINITIONS.items():
+    try:
+        print(f"  -> Creating tables {', '.join(TABLE_DEFINITIONS)} and table types {', '.join(TABLE_TYPE_DEFINITIONS)}...")
+        cursor.execute("\n".join([*TABLE_DEFINITIONS.values(), *TABLE_TYPE_DEFINITIONS.values()]))
+    except pyodbc.Error as e:
+        print(f"Database error while creating tables: {e}")
+        raise
+    print("Table creation complete.\n")
+
+def add_indexes(cursor):
+    print("Adding indexes to the loaded tables...")
+    for table_name, index_sql in ADD_INDEXES_SQL.items():
         try:
-            print(f"  -> Creating table '{table_name}'...")
-            cursor.execute(create_sql)
-            cursor.commit()
+            print(f"  -> Indexing table '{table_name}'...")
+            cursor.execute(index_sql)
         except pyodbc.Error as e:
-            print(f"Database error while creating table {table_name}: {e}")
-            cursor.rollback()
+            print(f"Database error while indexing table {table_name}: {e}")
             raise
-    print("Table creation complete.\n")
+    print("Indexing complete.\n")
+
+def tvp_insert(cursor, table, type_name, columns, rows):
+    """
+    Inserts all rows into dbo.{table} in one statement by sending them as a single
+    table-valued parameter of type dbo.{type_name}, whatever the row count.
+    The type's columns must match `columns` in order.
+    """
+    if not rows:
+        return
+    column_list = ", ".join(f"[{column}]" for column in columns)
+    # pyodbc reads a leading [type_name, schema] pair as the TVP's type descriptor.
+    cursor.execute(f"INSERT INTO dbo.{table} ({column_list}) SELECT {column_list} FROM ?;", [[type_name, 'dbo', *rows]])
+
+def _bcp_field(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    return str(value)
+
+def _bcp_connection_args():
+    """Returns the bcp -S and sign-in arguments; the port is only appended when DB_PORT is set."""
+    server = os.environ.get('DB_SERVER')
+    port = os.environ.get('DB_PORT')
+    args = ["-S", f"{server},{port}" if port else server]
+    if BCP_TRUSTED_CONNECTION:
+        return args + ["-T"]
+    return args + ["-U", os.environ.get('DB_USERNAME'), "-P", os.environ.get('DB_PASSWORD')]
+
+def bcp_insert(cursor, table, columns, rows):
+    """
+    Bulk-loads rows into dbo.{table} with the `bcp` utility.
+    Rows are written to a temp file and copied into a ##seed_stage_{table} heap,
+    which is then moved into the real table with one INSERT ... SELECT WITH (TABLOCK).
+    The stage table is owned by a separate autocommit connection so bcp's own
+    session is never blocked by the seeding transaction.
+    """
+    stage_name = f"##seed_stage_{table}"
+    column_list = ", ".join(f"[{column}]" for column in columns)
+    field_sep, row_sep = "\x1f", "\x1e" # Faker addresses can contain commas and newlines
+    stage_conn = pyodbc.connect(CONNECTION_STRING, autocommit=True)
+    try:
+        stage_conn.execute(f"SELECT TOP 0 {column_list} INTO {stage_name} FROM dbo.{table}")
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.dat', delete=False) as data_file:
+            for row in rows:
+                data_file.write(field_sep.join(_bcp_field(value) for value in row) + row_sep)
+        try:
+            subprocess.run(
+                ["bcp", f"tempdb..{stage_name}", "in", data_file.name,
+                 "-c", "-C", "65001", "-t", field_sep, "-r", row_sep,
+                 *_bcp_connection_args()],
+                check=True, capture_output=True, text=True
+            )
+        except subprocess.CalledProcessError as e:
+            # bcp reports most failures (login, conversion, ...) on stdout, not stderr.
+            print(f"bcp failed loading dbo.{table}:\n{(e.stdout or '').strip()}\n{(e.stderr or '').strip()}")
+            raise
+        finally:
+            os.remove(data_file.name)
+        cursor.execute(f"INSERT INTO dbo.{table} WITH (TABLOCK) ({column_list}) SELECT {column_list} FROM {stage_name};")
+    finally:
+        stage_conn.execute(f"DROP TABLE IF EXISTS {stage_name}")
+        stage_conn.close()
+
+def _insert_values_statements(table, columns, rows, chunk_param_limit):
+    """Yields (sql, params) multi-row INSERT statements for rows, chunked under the parameter limit."""
+    rows_per_chunk = max(1, min(1000, chunk_param_limit // len(columns)))
+    column_list = ", ".join(f"[{column}]" for column in columns)
+    row_placeholder = f"({', '.join('?' * len(columns))})"
+    for start in range(0, len(rows), rows_per_chunk):
+        chunk = rows[start:start + rows_per_chunk]
+        sql = f"INSERT INTO dbo.{table} ({column_list}) VALUES {', '.join([row_placeholder] * len(chunk))};"
+        yield sql, [value for row in chunk for value in row]
+
+def bulk_insert(cursor, table, columns, rows, chunk_param_limit=2000):
+    """
+    Inserts rows into dbo.{table} using multi-row `INSERT ... VALUES (...), (...)`
+    statements, so each chunk is a single statement and a single round-trip.
+    Chunks stay under SQL Server's 2100-parameter and 1000-row VALUES limits.
+    """
+    if not rows:
+        return
+    if BULK_LOADER == 'bcp' and shutil.which('bcp'):
+        return bcp_insert(cursor, table, columns, rows)
+    for sql, params in _insert_values_statements(table, columns, rows, chunk_param_limit):
+        cursor.execute(sql, params)
+
+def bulk_insert_batch(cursor, inserts, chunk_param_limit=2000):
+    """
+    Like bulk_insert for several (table, columns, rows) groups at once. Statements
+    for different tables share a single batch (and round-trip) while the combined
+    parameter count stays under the limit. Groups are inserted in the given order.
+    """
+    if BULK_LOADER == 'bcp' and shutil.which('bcp'):
+        for table, columns, rows in inserts:
+            bulk_insert(cursor, table, columns, rows)
+        return
+    batch_sql, batch_params = [], []
+    for table, columns, rows in inserts:
+        for sql, params in _insert_values_statements(table, columns, rows, chunk_param_limit):
+            if batch_params and len(batch_params) + len(params) > chunk_param_limit:
+                cursor.execute("\n".join(batch_sql), batch_params)
+                batch_sql, batch_params = [], []
+            batch_sql.append(sql)
+            batch_params.extend(params)
+    if batch_sql:
+        cursor.execute("\n".join(batch_sql), batch_params)
 
 # --- DATA POPULATION FUNCTIONS ---
 
+def build_text_pools(size=NUM_UNIQUE_ENTITIES * 2):
+    """
+    Fills text_pools with the names, phones, addresses and phrases the populators
+    sample from. This runs once, on the main thread, so the seeded output does not
+    depend on how the concurrent phases interleave.
+    """
+    if TEXT_SOURCE == 'faker':
+        # Imported here so schema-only callers never pay for loading Faker's locale data.
+        from faker import Faker
+        Faker.seed(RANDOM_SEED)
+        # Without weighting, Faker samples its locale lists with a plain random.choice.
+        fake = Faker('fa_IR', use_weighting=False)
+        text_pools.update(
+            first_names_male=[fake.first_name_male() for _ in range(size)],
+            first_names_female=[fake.first_name_female() for _ in range(size)],
+            last_names=[fake.last_name() for _ in range(size)],
+            phones=[fake.phone_number() for _ in range(size)],
+            addresses=[fake.address() for _ in range(size)],
+            words=[fake.word() for _ in range(size)],
+            bs_phrases=[fake.bs() for _ in range(size)],
+            catch_phrases=[fake.catch_phrase() for _ in range(size)],
+        )
+        return
+    rng = populator_rng('text_pools')
+    text_pools.update(
+        first_names_male=seed_data_pools.FIRST_NAMES_M,
+        first_names_female=seed_data_pools.FIRST_NAMES_F,
+        last_names=seed_data_pools.LAST_NAMES,
+        phones=["09" + "".join(rng.choices("0123456789", k=9)) for _ in range(size)],
+        addresses=[f"{rng.choice(seed_data_pools.STREETS)} {rng.randint(1, 200)}" for _ in range(size)],
+        words=seed_data_pools.SERVICE_WORDS,
+        bs_phrases=seed_data_pools.BS_PHRASES,
+        catch_phrases=seed_data_pools.CATCH_PHRASES,
+    )
+
+def populator_rng(name):
+    """Returns a random generator private to one populator, derived from RANDOM_SEED."""
+    return random.Random(f"{RANDOM_SEED}:{name}")
+
+def draw_ints(rng, low, high, k):
+    """Draws k integers from [low, high] in one rng.choices call instead of k randint calls."""
+    return rng.choices(range(low, high + 1), k=k)
+
+def draw_recent_dates(rng, anchor, max_days_back, k):
+    """Draws k values between 1 and max_days_back days before `anchor` (a date or datetime)."""
+    return rng.choices([anchor - timedelta(days=d) for d in range(1, max_days_back + 1)], k=k)
+
 def populate_services(cursor):
     """Generates test data for the 'service' table, including update scenarios."""
     print(f"Populating 'service' table with {NUM_UNIQUE_ENTITIES} stories...")
-    sql = "INSERT INTO dbo.service (serviceAid, serviceVid, type, code, title, unitref, serviceGroup, price, isChange) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);"
+    columns = ('serviceAid', 'serviceVid', 'type', 'code', 'title', 'unitref', 'serviceGroup', 'price', 'isChange')
     
-    for i in range(NUM_UNIQUE_ENTITIES):
-        service_vid = uuid.uuid4()
-        group = random.choice(['کلاس گروهی', 'کافه', 'فروشگاه', 'خدمات سالن'])
-        base_title = f"{group} - {fake.word()}"
-        base_price = random.randint(100, 1000) * 1000
+    base_rows, updated_rows, updated_service_vids = [], [], []
+    rng = populator_rng('services')
+    words = text_pools['words']
+    # Pre-draw the per-row random fields in bulk and index into them in the loop.
+    service_vids = bulk_uuids(NUM_UNIQUE_ENTITIES)
+    base_prices = draw_ints(rng, 100, 1000, NUM_UNIQUE_ENTITIES)
+    codes = draw_ints(rng, 100, 999, 2 * NUM_UNIQUE_ENTITIES) # base codes, then update codes
+
+    for i, service_vid in enumerate(service_vids):
+        group = rng.choice(['کلاس گروهی', 'کافه', 'فروشگاه', 'خدمات سالن'])
+        base_title = f"{group} - {rng.choice(words)}"
+        base_price = base_prices[i] * 1000
 
         # Create a simple new service
-        params = (None, service_vid, 2, random.randint(100, 999), base_title, 1, group, base_price, True)
-        cursor.execute(sql, params)
-        data_pools['services'][service_vid].append(cursor.execute("SELECT @@IDENTITY").fetchone()[0])
+        base_rows.append((None, service_vid, 2, codes[i], base_title, 1, group, base_price, True))
         
         # Occasionally, create an update for the service we just made
         if i % 3 == 0:
-            print(f"  -> Creating an update for service '{base_title}'")
-            # First, mark the original record as "not changed"
-            cursor.execute("UPDATE dbo.service SET isChange = 0 WHERE idd = ?", data_pools['services'][service_vid][-1])
+            updated_service_vids.append((service_vid,))
             
-            # Now, insert the new, updated record with the same serviceVid
+            # The new, updated record with the same serviceVid
             updated_title = f"{base_title} (جدید)"
             updated_price = base_price + 50000
-            params_update = (None, service_vid, 2, random.randint(100, 999), updated_title, 1, group, updated_price, True)
-            cursor.execute(sql, params_update)
-            data_pools['services'][service_vid].append(cursor.execute("SELECT @@IDENTITY").fetchone()[0])
-
-    cursor.commit()
+            updated_rows.append((None, service_vid, 2, codes[NUM_UNIQUE_ENTITIES + i], updated_title, 1, group, updated_price, True))
+
+    # Base records go in first, then the originals of updated services are marked
+    # "not changed" by serviceVid, and only then are the updated records inserted.
+    # Keying on serviceVid + isChange=1 avoids reading back each new idd.
+    bulk_insert(cursor, 'service', columns, base_rows)
+    data_pools['service_vids'].extend(service_vids)
+    if updated_service_vids:
+        cursor.executemany("UPDATE dbo.service SET isChange = 0 WHERE serviceVid = ? AND isChange = 1", updated_service_vids)
+        bulk_insert(cursor, 'service', columns, updated_rows)
+
+    print(f"  -> {len(base_rows)} services, {len(updated_rows)} of them with an update.")
     print("-> Done.\n")
 
 
 def populate_memberships(cursor):
     """Generates test data for the 'membership' table, including update scenarios with consistent IDs."""
     print(f"Populating 'membership' table with {NUM_UNIQUE_ENTITIES} stories...")
-    sql = "INSERT INTO dbo.membership (memberAid, personVId, memberVId, name, lastname, gender, MobilePhoneNumber1, Address1, isChange, RecognitionMethods, PersianMembershipDate, Birthday) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);"
+    columns = ('memberAid', 'personVId', 'memberVId', 'name', 'lastname', 'gender', 'MobilePhoneNumber1', 'Address1', 'isChange', 'RecognitionMethods', 'PersianMembershipDate', 'Birthday')
+
+    rows, updated_member_vids = [], []
+    rng = populator_rng('memberships')
+    first_names_male, first_names_female = text_pools['first_names_male'], text_pools['first_names_female']
+    last_names, phones, addresses = text_pools['last_names'], text_pools['phones'], text_pools['addresses']
+    person_vids = bulk_uuids(NUM_UNIQUE_ENTITIES) # The logical IDs for the people
+    member_vids = bulk_uuids(NUM_UNIQUE_ENTITIES) # The unique IDs for their first records
+    genders = draw_ints(rng, 0, 1, NUM_UNIQUE_ENTITIES)
+    new_member_vids = iter(bulk_uuids(NUM_UNIQUE_ENTITIES)) # For the updated records
 
     for i in range(NUM_UNIQUE_ENTITIES):
-        person_vid = uuid.uuid4() # The logical ID for the person
-        member_vid = uuid.uuid4() # The unique ID for this specific record
-        first_name, last_name = fake.first_name(), fake.last_name()
-        gender = random.randint(0, 1)
+        person_vid, member_vid, gender = person_vids[i], member_vids[i], genders[i]
+        first_name = rng.choice(first_names_male if gender else first_names_female)
+        last_name = rng.choice(last_names)
 
-        # Insert the initial record for the person
-        params = (None, person_vid, member_vid, first_name, last_name, gender, fake.phone_number(), fake.address(), True, 'معرف', '1402/05/10', '1375/03/15')
-        cursor.execute(sql, params)
+        # The initial record for the person
+        rows.append((None, person_vid, member_vid, first_name, last_name, gender, rng.choice(phones), rng.choice(addresses), True, 'معرف', '1402/05/10', '1375/03/15'))
         
-        data_pools['memberships'][person_vid].append(member_vid)
         data_pools['latest_member_vids'][person_vid] = (member_vid, f"{first_name} {last_name}")
 
         # Occasionally, create an update for the person we just made
         if i % 3 == 0:
-            print(f"  -> Creating an update for member '{first_name} {last_name}'")
-            # Mark the previous record as "not changed"
-            cursor.execute("UPDATE dbo.membership SET isChange = 0 WHERE memberVId = ?", member_vid)
+            # The previous record is marked as "not changed" in the update pass below
+            updated_member_vids.append((member_vid,))
             
-            # Insert the new, updated record with the SAME personVId but a NEW memberVId
-            new_member_vid = uuid.uuid4()
-            params_update = (None, person_vid, new_member_vid, first_name, last_name, gender, fake.phone_number(), "آدرس جدید", True, 'اینستاگرام', '1401/01/01', '1380/01/01')
-            cursor.execute(sql, params_update)
+            # The new, updated record with the SAME personVId but a NEW memberVId
+            new_member_vid = next(new_member_vids)
+            rows.append((None, person_vid, new_member_vid, first_name, last_name, gender, rng.choice(phones), "آدرس جدید", True, 'اینستاگرام', '1401/01/01', '1380/01/01'))
             
-            data_pools['memberships'][person_vid].append(new_member_vid)
             data_pools['latest_member_vids'][person_vid] = (new_member_vid, f"{first_name} {last_name}")
 
-    cursor.commit()
+    # Insert pass, then update pass. The update is keyed on the superseded
+    # memberVId, so it never touches the newer records inserted alongside it.
+    bulk_insert(cursor, 'membership', columns, rows)
+    data_pools['person_vids'].extend(person_vids)
+    if updated_member_vids:
+        cursor.executemany("UPDATE dbo.membership SET isChange = 0 WHERE memberVId = ?", updated_member_vids)
+
+    print(f"  -> {NUM_UNIQUE_ENTITIES} members, {len(updated_member_vids)} of them with an update.")
     print("-> Done.\n")
 
 def populate_invoices(cursor):
     print(f"Populating 'invoiceHed' and 'invoiceItem' tables with {NUM_UNIQUE_ENTITIES} stories...")
-    if not data_pools['latest_member_vids'] or not data_pools['services']:
+    if not data_pools['latest_member_vids'] or not data_pools['service_vids']:
         print("Skipping invoice population: Missing membership or service data.")
         return
 
-    sql_hed = "INSERT INTO dbo.invoiceHed (invoiceVID, Title, OrganizationID, IssueDate, PersonVID, CreatorUserVID, isChange) VALUES (?, ?, ?, ?, ?, ?, ?);"
-    sql_item = "INSERT INTO dbo.invoiceItem (invoiceVID, Title, itemVID, ProducVtID, count, UnitPrice, ProductUnitVID, ProductType, isChange) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);"
-
-    for i in range(NUM_UNIQUE_ENTITIES):
-        invoice_vid = uuid.uuid4()
+    hed_columns = ('invoiceVID', 'Title', 'OrganizationID', 'IssueDate', 'PersonVID', 'CreatorUserVID', 'isChange')
+    item_columns = ('invoiceVID', 'Title', 'itemVID', 'ProducVtID', 'count', 'UnitPrice', 'ProductUnitVID', 'ProductType', 'isChange')
+
+    heds, items = [], []
+    rng = populator_rng('invoices')
+    bs_phrases = text_pools['bs_phrases']
+    person_keys = data_pools['person_vids']
+    service_keys = data_pools['service_vids']
+    orgs, users = data_pools['organizations'], data_pools['creator_users']
+    today = datetime.now().date()
+    invoice_vids = bulk_uuids(NUM_UNIQUE_ENTITIES)
+    issue_dates = draw_recent_dates(rng, today, 30, NUM_UNIQUE_ENTITIES)
+    titles = draw_ints(rng, 1000, 9999, NUM_UNIQUE_ENTITIES)
+    item_counts = draw_ints(rng, 1, 3, NUM_UNIQUE_ENTITIES)
+    item_prices = iter(draw_ints(rng, 50, 200, sum(item_counts)))
+    # One bulk draw per pool instead of a random.choice per row.
+    person_samples = rng.choices(person_keys, k=NUM_UNIQUE_ENTITIES)
+    org_samples = rng.choices(orgs, k=NUM_UNIQUE_ENTITIES)
+    user_samples = rng.choices(users, k=NUM_UNIQUE_ENTITIES)
+    product_samples = iter(rng.choices(service_keys, k=sum(item_counts)))
+    title_samples = iter(rng.choices(bs_phrases, k=sum(item_counts)))
+    item_vids = iter(bulk_uuids(sum(item_counts)))
+
+    for i, invoice_vid in enumerate(invoice_vids):
         # Pick a random person and use their LATEST memberVId for the invoice
-        person_vid = random.choice(list(data_pools['latest_member_vids'].keys()))
+        person_vid = person_samples[i]
         latest_member_vid, _ = data_pools['latest_member_vids'][person_vid]
         
-        org_id = random.choice(data_pools['organizations'])
-        user_id = random.choice(data_pools['creator_users'])
-        issue_date = datetime.now().date() - timedelta(days=random.randint(1, 30))
+        org_id = org_samples[i]
+        user_id = user_samples[i]
 
-        cursor.execute(sql_hed, (invoice_vid, str(random.randint(1000, 9999)), org_id, issue_date, latest_member_vid, user_id, True))
+        heds.append((invoice_vid, str(titles[i]), org_id, issue_dates[i], latest_member_vid, user_id, True))
 
-        for j in range(random.randint(1, 3)):
-            product_vid = random.choice(list(data_pools['services'].keys()))
-            price = random.randint(50, 200) * 1000
-            cursor.execute(sql_item, (invoice_vid, fake.bs(), uuid.uuid4(), product_vid, 1, price, 1, 1, True))
-    
-    cursor.commit()
+        for j in range(item_counts[i]):
+            product_vid = next(product_samples)
+            price = next(item_prices) * 1000
+            items.append((invoice_vid, next(title_samples), next(item_vids), product_vid, 1, price, 1, 1, True))
+
+    # Items reference their header by the client-generated invoiceVID, so both
+    # tables can go out together without any identity lookups.
+    bulk_insert_batch(cursor, [('invoiceHed', hed_columns, heds), ('invoiceItem', item_columns, items)])
     print("-> Done.\n")
 
 def populate_service_invoices(cursor):
     print(f"Populating 'ServiceInvoice' table with {NUM_UNIQUE_ENTITIES} stories...")
-    if not data_pools['latest_member_vids'] or not data_pools['services']:
+    if not data_pools['latest_member_vids'] or not data_pools['service_vids']:
         print("Skipping ServiceInvoice population: Missing membership or service data.")
         return
         
-    sql = "INSERT INTO dbo.ServiceInvoice (id, title, OrganizationID, IssueDate, personid, CreatorUser, ProducVtID, ServiceTitle, UnitPrice, count, ProductUnitVID, ProductType, ischange) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);"
+    columns = ('id', 'title', 'OrganizationID', 'IssueDate', 'personid', 'CreatorUser', 'ProducVtID', 'ServiceTitle', 'UnitPrice', 'count', 'ProductUnitVID', 'ProductType', 'ischange')
+    rows = []
+    rng = populator_rng('service_invoices')
+    catch_phrases = text_pools['catch_phrases']
+    person_keys = data_pools['person_vids']
+    service_keys = data_pools['service_vids']
+    orgs, users = data_pools['organizations'], data_pools['creator_users']
+    now = datetime.now()
+    issue_dates = draw_recent_dates(rng, now, 30, NUM_UNIQUE_ENTITIES)
+    prices = draw_ints(rng, 200, 500, NUM_UNIQUE_ENTITIES)
+    titles = draw_ints(rng, 10000, 99999, NUM_UNIQUE_ENTITIES)
+    person_samples = rng.choices(person_keys, k=NUM_UNIQUE_ENTITIES)
+    product_samples = rng.choices(service_keys, k=NUM_UNIQUE_ENTITIES)
+    org_samples = rng.choices(orgs, k=NUM_UNIQUE_ENTITIES)
+    user_samples = rng.choices(users, k=NUM_UNIQUE_ENTITIES)
+    phrase_samples = rng.choices(catch_phrases, k=NUM_UNIQUE_ENTITIES)
+    invoice_ids = bulk_uuids(NUM_UNIQUE_ENTITIES)
     
     for i in range(NUM_UNIQUE_ENTITIES):
         # Pick a random person and use their LATEST memberVId for the invoice
-        person_vid = random.choice(list(data_pools['latest_member_vids'].keys()))
+        person_vid = person_samples[i]
         latest_member_vid, _ = data_pools['latest_member_vids'][person_vid]
         
-        product_vid = random.choice(list(data_pools['services'].keys()))
-        org_id = random.choice(data_pools['organizations'])
-        user_id = random.choice(data_pools['creator_users'])
-        issue_date = datetime.now() - timedelta(days=random.randint(1, 30))
-        price = random.randint(200, 500) * 1000
+        product_vid = product_samples[i]
+        org_id = org_samples[i]
+        user_id = user_samples[i]
+        price = prices[i] * 1000
         
-        params = (uuid.uuid4(), str(random.randint(10000, 99999)), org_id, issue_date, latest_member_vid, user_id, product_vid, fake.catch_phrase(), price, 1, 1, 2, True)
-        cursor.execute(sql, params)
+        rows.append((invoice_ids[i], str(titles[i]), org_id, issue_dates[i], latest_member_vid, user_id, product_vid, phrase_samples[i], price, 1, 1, 2, True))
         
-    cursor.commit()
+    bulk_insert(cursor, 'ServiceInvoice', columns, rows)
     print("-> Done.\n")
 
 def populate_receipts(cursor):
@@ -301,112 +595,187 @@ def populate_receipts(cursor):
         print("Skipping receipt population: Missing membership data.")
         return
 
-    sql = "INSERT INTO dbo.receipt (vID, tarikh, personid, fullname, title, Amount, modeldaryaft, ReceiveType, BankName, BankAccount, ChequeNumber, isChange) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);"
+    columns = ('vID', 'tarikh', 'personid', 'fullname', 'title', 'Amount', 'modeldaryaft', 'ReceiveType', 'BankName', 'BankAccount', 'ChequeNumber', 'isChange')
+    rows = []
+    rng = populator_rng('receipts')
+    person_keys = data_pools['person_vids']
+    today = datetime.now().date()
+    issue_dates = draw_recent_dates(rng, today, 60, NUM_UNIQUE_ENTITIES)
+    amounts = draw_ints(rng, 1000, 5000, NUM_UNIQUE_ENTITIES)
+    person_samples = rng.choices(person_keys, k=NUM_UNIQUE_ENTITIES)
+    receipt_types = rng.choices(['حواله', 'چک', 'نقد'], k=NUM_UNIQUE_ENTITIES)
+    receipt_vids = bulk_uuids(NUM_UNIQUE_ENTITIES)
     
     for i in range(NUM_UNIQUE_ENTITIES):
-        person_vid_key = random.choice(list(data_pools['latest_member_vids'].keys()))
+        person_vid_key = person_samples[i]
         latest_member_vid, fullname = data_pools['latest_member_vids'][person_vid_key]
-        issue_date = datetime.now().date() - timedelta(days=random.randint(1, 60))
-        amount = random.randint(1000, 5000) * 1000
+        issue_date = issue_dates[i]
+        amount = amounts[i] * 1000
         
-        receipt_type = random.choice(['حواله', 'چک', 'نقد'])
+        receipt_type = receipt_types[i]
         
         bank_name, bank_account_guid, cheque_number, receive_type_guid = None, None, None, None
 
         if receipt_type == 'حواله':
-            bank_account_guid = random.choice(data_pools['transfer_bank_account_guids'])
-            print(f"  -> Creating 'حواله' (transfer) receipt. Mapping key will be BankAccount GUID: {bank_account_guid}")
+            bank_account_guid = rng.choice(data_pools['transfer_bank_account_guids'])
         
         elif receipt_type == 'چک':
-            bank_name = random.choice(data_pools['cheque_bank_names'])
-            cheque_number = str(random.randint(100000, 999999))
-            print(f"  -> Creating 'چک' (cheque) receipt. Mapping key will be BankName: {bank_name}")
+            bank_name = rng.choice(data_pools['cheque_bank_names'])
+            cheque_number = str(rng.randint(100000, 999999))
 
         else: # 'نقد'
-            receive_type_guid = random.choice(data_pools['cash_receive_type_guids'])
-            print(f"  -> Creating 'نقد' (cash) receipt. Mapping key will be ReceiveType GUID: {receive_type_guid}")
+            receive_type_guid = rng.choice(data_pools['cash_receive_type_guids'])
             
-        params = (uuid.uuid4(), issue_date, latest_member_vid, fullname, f"دریافت وجه از {fullname}", amount, receipt_type, receive_type_guid, bank_name, bank_account_guid, cheque_number, True)
-        cursor.execute(sql, params)
+        rows.append((receipt_vids[i], issue_date, latest_member_vid, fullname, f"دریافت وجه از {fullname}", amount, receipt_type, receive_type_guid, bank_name, bank_account_guid, cheque_number, True))
 
-    cursor.commit()
+    tvp_insert(cursor, 'receipt', 'ReceiptTVP', columns, rows)
+    type_counts = Counter(row[6] for row in rows)
+    # Mapping keys: BankAccount GUID for 'حواله', BankName for 'چک', ReceiveType GUID for 'نقد'.
+    print(f"  -> حواله: {type_counts['حواله']}, چک: {type_counts['چک']}, نقد: {type_counts['نقد']}")
     print("-> Done.\n")
 
 
-def populate_corrupted_data(cursor):
+def populate_corrupted_data(cursor, rng):
     print("Populating tables with intentionally corrupted data for testing...")
+    new_ids = iter(bulk_uuids(15))
     
     # Membership Corruptions
     print("  -> Corrupting Memberships:")
-    sql_member = "INSERT INTO dbo.membership (personVId, memberVId, name, lastname, gender, MobilePhoneNumber1, isChange) VALUES (?, ?, ?, ?, ?, ?, ?);"
+    member_columns = ('personVId', 'memberVId', 'name', 'lastname', 'gender', 'MobilePhoneNumber1', 'isChange')
     print("     - Adding member with missing last name...")
-    cursor.execute(sql_member, (uuid.uuid4(), uuid.uuid4(), 'Corrupted - Missing LastName', None, 1, fake.phone_number(), True))
     print("     - Adding members with duplicate phone number...")
-    dup_phone = '09123456789'
-    cursor.execute(sql_member, (uuid.uuid4(), uuid.uuid4(), 'Corrupted - Duplicate Phone 1', 'UserA', 1, dup_phone, True))
-    cursor.execute(sql_member, (uuid.uuid4(), uuid.uuid4(), 'Corrupted - Duplicate Phone 2', 'UserB', 0, dup_phone, True))
     print("     - Adding member with invalid gender mapping ID...")
-    cursor.execute(sql_member, (uuid.uuid4(), uuid.uuid4(), 'Corrupted', 'Invalid Gender', 99, fake.phone_number(), True))
+    dup_phone = '09123456789'
+    bulk_insert(cursor, 'membership', member_columns, [
+        (next(new_ids), next(new_ids), 'Corrupted - Missing LastName', None, 1, rng.choice(text_pools['phones']), True),
+        (next(new_ids), next(new_ids), 'Corrupted - Duplicate Phone 1', 'UserA', 1, dup_phone, True),
+        (next(new_ids), next(new_ids), 'Corrupted - Duplicate Phone 2', 'UserB', 0, dup_phone, True),
+        (next(new_ids), next(new_ids), 'Corrupted', 'Invalid Gender', 99, rng.choice(text_pools['phones']), True),
+    ])
 
     # Service Corruptions
     print("  -> Corrupting Services:")
-    sql_service = "INSERT INTO dbo.service (serviceVid, type, title, unitref, price, isChange) VALUES (?, ?, ?, ?, ?, ?);"
+    service_columns = ('serviceVid', 'type', 'title', 'unitref', 'price', 'isChange')
     print("     - Adding service with missing title...")
-    cursor.execute(sql_service, (uuid.uuid4(), 2, None, 1, 10000, True))
     print("     - Adding service with invalid type mapping ID...")
-    cursor.execute(sql_service, (uuid.uuid4(), 99, 'Corrupted - Invalid Type', 1, 20000, True))
+    bulk_insert(cursor, 'service', service_columns, [
+        (next(new_ids), 2, None, 1, 10000, True),
+        (next(new_ids), 99, 'Corrupted - Invalid Type', 1, 20000, True),
+    ])
 
     # Invoice Corruptions
     print("  -> Corrupting Invoices:")
-    sql_service_inv = "INSERT INTO dbo.ServiceInvoice (id, title, OrganizationID, IssueDate, personid, CreatorUser, ProducVtID, ServiceTitle, UnitPrice, count, ischange) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);"
-    person_keys = list(data_pools['latest_member_vids'].keys())
-    service_keys = list(data_pools['services'].keys())
+    service_inv_columns = ('id', 'title', 'OrganizationID', 'IssueDate', 'personid', 'CreatorUser', 'ProducVtID', 'ServiceTitle', 'UnitPrice', 'count', 'ischange')
+    person_keys = data_pools['person_vids']
+    service_keys = data_pools['service_vids']
     org_id = data_pools['organizations'][0]
     user_id = data_pools['creator_users'][0]
+    now = datetime.now()
     
-    print("     - Adding orphaned service invoice (bad personid)...")
-    cursor.execute(sql_service_inv, (uuid.uuid4(), 'Corrupted - Orphan Invoice', org_id, datetime.now(), uuid.uuid4(), user_id, service_keys[0], 'Test', 100, 1, True))
+    latest_member_vid, _ = data_pools['latest_member_vids'][person_keys[0]]
     
+    print("     - Adding orphaned service invoice (bad personid)...")
     print("     - Adding service invoice with non-existent product...")
-    latest_member_vid, _ = data_pools['latest_member_vids'][person_keys[0]]
-    cursor.execute(sql_service_inv, (uuid.uuid4(), 'Corrupted - Bad Product', org_id, datetime.now(), latest_member_vid, user_id, uuid.uuid4(), 'Test', 100, 1, True))
+    bulk_insert(cursor, 'ServiceInvoice', service_inv_columns, [
+        (next(new_ids), 'Corrupted - Orphan Invoice', org_id, now, next(new_ids), user_id, service_keys[0], 'Test', 100, 1, True),
+        (next(new_ids), 'Corrupted - Bad Product', org_id, now, latest_member_vid, user_id, next(new_ids), 'Test', 100, 1, True),
+    ])
     
     print("     - Adding store invoice header with no items...")
-    sql_hed = "INSERT INTO dbo.invoiceHed (invoiceVID, Title, OrganizationID, IssueDate, PersonVID, CreatorUserVID, isChange) VALUES (?, ?, ?, ?, ?, ?, ?);"
-    cursor.execute(sql_hed, (uuid.uuid4(), 'Corrupted - No Items', org_id, datetime.now(), latest_member_vid, user_id, True))
+    hed_columns = ('invoiceVID', 'Title', 'OrganizationID', 'IssueDate', 'PersonVID', 'CreatorUserVID', 'isChange')
+    bulk_insert(cursor, 'invoiceHed', hed_columns, [(next(new_ids), 'Corrupted - No Items', org_id, now, latest_member_vid, user_id, True)])
 
-    cursor.commit()
     print("-> Done.\n")
     
     
-def run_seeding():
+def _populate_on_own_connection(populate):
+    """Runs one populator on a dedicated connection and commits its own transaction."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        # Keyed update passes go out as one parameter array instead of one round-trip per row.
+        cursor.fast_executemany = True
+        populate(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def run_populate_phase(*populators):
+    """
+    Runs independent populators concurrently, one connection each. pyodbc releases
+    the GIL while waiting on the server, so the phases overlap their round-trips.
+    Returns once every populator has finished; the first failure is re-raised.
+    """
+    with ThreadPoolExecutor(max_workers=len(populators)) as executor:
+        futures = [executor.submit(_populate_on_own_connection, populate) for populate in populators]
+        for future in futures:
+            future.result()
+
+def _reset_tables(conn):
+    """Drops and recreates the business tables empty after a failed run."""
+    print("Emptying the tables the failed run had already loaded...")
+    try:
+        cursor = conn.cursor()
+        drop_existing_tables(cursor)
+        create_tables(cursor)
+        conn.commit()
+    except pyodbc.Error as e:
+        print(f"Could not reset the tables; they may hold partial data: {e}")
+        conn.rollback()
+
+def run_seeding(skip_corrupted=False):
+    """
+    Drops, recreates and fills the business tables.
+    The populators commit on their own connections, so a failure part-way cannot be
+    rolled back as a whole. Instead the tables are dropped and recreated empty, and a
+    failed run never leaves a partially seeded database behind.
+    """
     conn = None
+    schema_committed = False
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
+        if BULK_LOADER == 'bcp' and not shutil.which('bcp'):
+            print("SEED_BULK_LOADER=bcp but the bcp utility was not found; using multi-row INSERTs.\n")
         
         drop_existing_tables(cursor)
         create_tables(cursor)
+        # The populators run on their own connections, which cannot see uncommitted tables.
+        conn.commit()
+        schema_committed = True
         
-        populate_memberships(cursor)
-        populate_services(cursor)
-        populate_invoices(cursor)
-        populate_service_invoices(cursor)
-        populate_receipts(cursor)
+        build_text_pools()
+        # Services and memberships are independent; the invoice and receipt tables only
+        # read from the pools those two fill, which are not modified after this barrier.
+        run_populate_phase(populate_memberships, populate_services)
+        run_populate_phase(populate_invoices, populate_service_invoices, populate_receipts)
         
-        populate_corrupted_data(cursor)
+        if skip_corrupted:
+            print("Skipping corrupted data population.\n")
+        else:
+            populate_corrupted_data(cursor, populator_rng('corrupted'))
+        add_indexes(cursor)
         
+        conn.commit()
         print("\nDatabase seeding completed successfully!")
         
-    except (pyodbc.Error, ValueError) as e:
+    except (pyodbc.Error, ValueError, subprocess.CalledProcessError) as e:
         print(f"An error occurred: {e}")
         if conn:
             conn.rollback()
+            if schema_committed:
+                _reset_tables(conn)
     finally:
         if conn:
             conn.close()
             print("Database connection closed.")
 
 if __name__ == "__main__":
-    run_seeding()
+    parser = argparse.ArgumentParser(description="Drops, recreates and seeds the source business tables with fake data.")
+    parser.add_argument('--skip-corrupted', action='store_true', help="Only load the clean dataset; skip the intentionally corrupted rows.")
+    args = parser.parse_args()
+    run_seeding(skip_corrupted=args.skip_corrupted)
 # end of tests/seed_database.py
\ No newline at end of file
@@ -0,0 +1,27 @@
+import os
+import sys
+from datetime import date, datetime
+
+# --- Setup Project Path so we can import from 'app' ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from app.utils.date_converter import convert_date_for_invoice_api
+
+
+def test_invoice_date_is_jalali():
+    # 2024-01-01 falls in Dey (month 10) of 1402.
+    result = convert_date_for_invoice_api(datetime(2024, 1, 1))
+    assert result.startswith("10_")
+    assert result == "10_11_1402 00:00"
+
+
+def test_invoice_date_accepts_date_and_string():
+    assert convert_date_for_invoice_api(date(2024, 3, 20)) == "01_01_1403 00:00"
+    assert convert_date_for_invoice_api("2024-03-20 14:30:00") == "01_01_1403 14:30"
+
+
+def test_invoice_date_rejects_empty_and_invalid():
+    assert convert_date_for_invoice_api(None) is None
+    assert convert_date_for_invoice_api("not a date") is None
@@ -1,24 +1,25 @@
 import os
 import sys
 import logging
-import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
 
 # --- Setup Project Path so we can import from 'app' ---
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from app import create_app, db
+from app import db
 from app.models import Mapping
 from app.services.db_repositories import (
     MembershipRepository, ServiceRepository, InvoiceHeaderRepository,
     ServiceInvoiceRepository, ReceiptRepository
 )
 from app.services import mapping_service
-from sqlalchemy import text
+from tests.mapping_helpers import upsert_mapping
+from sqlalchemy import case, column, delete, func, select, table
 
-# Configure standard logging for terminal output
-logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger("IDD_FILTER_TEST_SUITE")
 
 # A mapping from table short names to their repository classes
@@ -30,132 +31,137 @@ REPOSITORIES = {
     'receipt': ReceiptRepository
 }
 
-def get_pending_idds(table_name, limit=1000):
-    """Helper to get a list of actual pending IDDs from the DB to use for testing."""
-    query = text(f"SELECT TOP {limit} idd FROM dbo.{table_name} WHERE fetchStatus IS NULL ORDER BY idd ASC")
-    result = db.session.execute(query).fetchall()
-    return [row[0] for row in result]
-
-# --- START OF MODIFICATION ---
-def get_absolute_max_idd(table_name):
-    """Finds the true maximum IDD in the entire table."""
-    query = text(f"SELECT MAX(idd) FROM dbo.{table_name}")
-    result = db.session.execute(query).scalar()
-    return result or 0
-# --- END OF MODIFICATION ---
+def _build_idd_stats_query(table_name):
+    t = table(table_name, column('idd'), column('fetchStatus'), schema='dbo')
+    ranked = select(
+        t.c.idd,
+        func.row_number().over(order_by=t.c.idd).label('rn'),
+        func.count().over().label('cnt'),
+    ).where(t.c.fetchStatus.is_(None)).subquery('ranked')
+    # Every pending statistic comes from the one ranked pass; only the table
+    # max needs its own scan.
+    pending_stats = select(
+        func.min(ranked.c.idd).label('min_idd'),
+        func.max(case((ranked.c.rn == ranked.c.cnt // 2 + 1, ranked.c.idd))).label('mid_idd'),
+        func.max(ranked.c.idd).label('max_idd'),
+        func.count().label('total_pending'),
+    ).subquery('pending_stats')
+    return select(
+        pending_stats,
+        select(func.max(t.c.idd)).scalar_subquery().label('absolute_max_idd'),
+    )
+
+# Built once at import; the table names come from REPOSITORIES, never from input.
+_IDD_STATS_QUERIES = {table_name: _build_idd_stats_query(table_name) for table_name in REPOSITORIES}
+
+def get_idd_stats(table_name):
+    """
+    Returns one row of IDD statistics for a table in a single round-trip:
+    min_idd, mid_idd (the median), max_idd and total_pending over the pending
+    records, plus absolute_max_idd over the whole table. The pending columns
+    are NULL and total_pending is 0 when nothing is pending.
+    """
+    return db.session.execute(_IDD_STATS_QUERIES[table_name]).one()
 
 def set_idd_filter(table_short_name, value):
-    """Helper to update the mapping using the service layer."""
-    val_str = str(value) if value is not None and value != '' else ""
-    mapping_service.save_mappings('MinimumIddFilter', [{
-        'source_id': table_short_name,
-        'source_name': f'Test Set for {table_short_name}',
-        'asanito_id': val_str
-    }])
-    db.session.commit()
+    """
+    Sets or clears the table's MinimumIddFilter mapping without committing.
+    The repositories read the mapping through the same session, so the change
+    is visible to them at once; db_session rolls it back after the test.
+    """
     if value:
-         logger.info(f"--> FILTER SET: {table_short_name} >= {value}")
+        upsert_mapping('MinimumIddFilter', table_short_name, value,
+                       source_name=f'Test Set for {table_short_name}')
+        logger.info("--> FILTER SET: %s >= %s", table_short_name, value)
     else:
-         logger.info(f"--> FILTER CLEARED for {table_short_name}")
-
-def run_tests():
-    app = create_app('development')
-    
-    with app.app_context():
-        logger.info("\n" + "=" * 70)
-        logger.info("  TEST SUITE START: Minimum IDD Filter for ALL Tables")
-        logger.info("=" * 70)
-
-        for table_name, repository_class in REPOSITORIES.items():
-            logger.info("\n" + "#" * 70)
-            logger.info(f"###   TESTING TABLE: {table_name}")
-            logger.info("#" * 70)
-
-            # 1. Pre-flight Check for the current table
-            pending_idds = get_pending_idds(table_name)
-            if not pending_idds:
-                logger.warning(f"SKIPPING: No pending records found for table '{table_name}'. Cannot test.")
-                continue
-
-            total_pending = len(pending_idds)
-            min_idd = pending_idds[0]
-            # --- MODIFICATION: Get the true max IDD for the extreme test ---
-            absolute_max_idd = get_absolute_max_idd(table_name)
-            
-            mid_index = total_pending // 2 if total_pending > 1 else 0
-            mid_idd = pending_idds[mid_index]
-
-            logger.info(f"Data Analysis: Found {total_pending}+ pending records.")
-            logger.info(f"Sampled IDD Range: MIN={min_idd}, MAX={pending_idds[-1]}")
-            logger.info(f"Selected Median IDD for testing: {mid_idd}")
-            logger.info(f"Absolute MAX IDD in table: {absolute_max_idd}")
-            logger.info("-" * 70)
-
-            # 2. Baseline Run (No Filter)
-            logger.info("[SCENARIO 1] Baseline Run (No Filter)")
-            set_idd_filter(table_name, None)
-            
-            units_baseline = repository_class.find_work_units(limit=500)
-            count_baseline = len(units_baseline)
-            logger.info(f"RESULT: Found {count_baseline} work units.")
-
-            if count_baseline == 0:
-                 logger.error("Unexpected: Found 0 work units despite having pending IDDs. Skipping rest of test for this table.")
-                 continue
-
-            # 3. Filtered Run (Median IDD)
-            logger.info(f"\n[SCENARIO 2] Filtered Run (Minimum IDD = {mid_idd})")
-            set_idd_filter(table_name, mid_idd)
-            
-            units_filtered = repository_class.find_work_units(limit=500)
-            count_filtered = len(units_filtered)
-            logger.info(f"RESULT: Found {count_filtered} work units.")
-            
-            if count_filtered < count_baseline:
-                logger.info(f"SUCCESS: Filtered count ({count_filtered}) is lower than baseline ({count_baseline}).")
-            else:
-                logger.warning(f"NOTE: Filtered count ({count_filtered}) is not lower than baseline. This is okay if the first batch of work units is all above the threshold.")
-
-            violation_found = False
-            for unit in units_filtered:
-                if unit['new_data_row']['idd'] < mid_idd:
-                    logger.error(f"FAILURE: Found record with IDD {unit['new_data_row']['idd']} which is LESS than filter {mid_idd}!")
-                    violation_found = True
-                    break
-            if not violation_found:
-                 logger.info("SUCCESS: Verified that all returned records respect the IDD threshold.")
-
-            # 4. Extreme Filter Run (Max IDD + 1)
-            # --- MODIFICATION: Use the absolute max IDD for a reliable extreme filter ---
-            extreme_idd = absolute_max_idd + 1 
-            logger.info(f"\n[SCENARIO 3] Extreme Filter Run (Minimum IDD = {extreme_idd})")
-            set_idd_filter(table_name, extreme_idd)
-            
-            units_extreme = repository_class.find_work_units(limit=500)
-            logger.info(f"RESULT: Found {len(units_extreme)} work units.")
-            
-            if len(units_extreme) == 0:
-                logger.info("SUCCESS: Extreme filter correctly blocked all current pending records.")
-            else:
-                logger.error(f"FAILURE: Filter {extreme_idd} should have blocked everything, but found {len(units_extreme)} records.")
-
-            # 5. Cleanup / Restoration
-            logger.info("\n[SCENARIO 4] Cleanup & Restoration (Clearing Filter)")
-            set_idd_filter(table_name, None)
-            
-            units_restored = repository_class.find_work_units(limit=500)
-            count_restored = len(units_restored)
-            logger.info(f"RESULT: Found {count_restored} work units after cleanup.")
-            
-            if count_restored == count_baseline:
-                 logger.info("SUCCESS: System restored to baseline state for this table.")
-            else:
-                 logger.warning(f"WARNING: Restored count ({count_restored}) differs from baseline ({count_baseline}). Data might have changed during test.")
-
-        logger.info("\n" + "=" * 70)
-        logger.info("  TEST SUITE COMPLETE")
-        logger.info("=" * 70)
-
-
-if __name__ == '__main__':
-    run_tests()
\ No newline at end of file
+        db.session.execute(delete(Mapping).where(
+            Mapping.map_type == 'MinimumIddFilter', Mapping.source_id == table_short_name
+        ))
+        mapping_service.invalidate('MinimumIddFilter', table_short_name)
+        logger.info("--> FILTER CLEARED for %s", table_short_name)
+
+
+def find_work_units_in_worker(repository_class, filter_value, limit=500):
+    """
+    Runs find_work_units from a worker thread with the filter passed straight
+    to the repository (None means unfiltered), so the result doesn't depend on
+    the MinimumIddFilter mapping. Releases the thread's pooled connection
+    afterwards.
+    """
+    try:
+        return repository_class.find_work_units(limit=limit, min_idd=filter_value or 0)
+    finally:
+        db.session.remove()
+
+
+# Each table reads and writes only its own MinimumIddFilter row (keyed by the
+# table's short name), but upsert_mapping's MERGE ... WITH (HOLDLOCK) takes
+# key-range locks on dbo.mapping that cover neighbouring keys as well. Cases
+# running on different xdist workers would block on each other until their
+# rolled-back transactions end, so every test that writes mappings shares one
+# worker.
+@pytest.mark.xdist_group("mapping_writes")
+@pytest.mark.parametrize("table_name, repository_class", REPOSITORIES.items(), ids=list(REPOSITORIES))
+def test_minimum_idd_filter(db_session, table_name, repository_class):
+    # 1. Pre-flight Check for the current table
+    stats = get_idd_stats(table_name)
+    if not stats.total_pending:
+        pytest.skip(f"No pending records found for table '{table_name}'. Cannot test.")
+
+    mid_idd = stats.mid_idd
+    absolute_max_idd = stats.absolute_max_idd
+
+    logger.info(
+        "Data Analysis: Found %d pending records. Pending IDD Range: MIN=%s, MAX=%s. "
+        "Selected Median IDD for testing: %s. Absolute MAX IDD in table: %s",
+        stats.total_pending, stats.min_idd, stats.max_idd, mid_idd, absolute_max_idd,
+    )
+
+    # The subqueries in get_idd_stats may see rows committed between them, so
+    # don't trust the table max alone to lie above every pending IDD.
+    extreme_idd = max(absolute_max_idd or 0, stats.max_idd) + 1
+
+    # Scenarios 1 and 3 pass their filter to find_work_units directly, so they
+    # run concurrently on separate pooled connections (see db_session) while
+    # Scenario 2 goes through the MinimumIddFilter mapping on the test's own
+    # session, where the uncommitted mapping row is visible.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        baseline_future, extreme_future = [
+            executor.submit(find_work_units_in_worker, repository_class, filter_value)
+            for filter_value in (None, extreme_idd)
+        ]
+        set_idd_filter(table_name, mid_idd)
+        units_filtered = repository_class.find_work_units(limit=500)
+        units_baseline = baseline_future.result()
+        units_extreme = extreme_future.result()
+
+    # 2. Baseline Run (No Filter)
+    logger.info("[SCENARIO 1] Baseline Run (No Filter)")
+    count_baseline = len(units_baseline)
+    logger.info("RESULT: Found %d work units.", count_baseline)
+    assert count_baseline > 0, "Found 0 work units despite having pending IDDs."
+
+    # 3. Filtered Run (Median IDD)
+    logger.info("[SCENARIO 2] Filtered Run via the mapping (Minimum IDD = %s)", mid_idd)
+    count_filtered = len(units_filtered)
+    logger.info("RESULT: Found %d work units.", count_filtered)
+
+    if count_filtered >= count_baseline:
+        logger.warning("NOTE: Filtered count (%d) is not lower than baseline. This is okay if the first batch of work units is all above the threshold.", count_filtered)
+
+    # One reduction instead of a per-unit assert; the lowest IDD is the only one that can break the filter.
+    lowest_idd = min((unit['new_data_row']['idd'] for unit in units_filtered), default=mid_idd)
+    assert lowest_idd >= mid_idd, \
+        f"Found record with IDD {lowest_idd} which is LESS than filter {mid_idd}!"
+
+    # 4. Extreme Filter Run (Max IDD + 1)
+    logger.info("[SCENARIO 3] Extreme Filter Run (Minimum IDD = %s)", extreme_idd)
+    logger.info("RESULT: Found %d work units.", len(units_extreme))
+    assert len(units_extreme) == 0, \
+        f"Filter {extreme_idd} should have blocked everything, but found {len(units_extreme)} records."
+
+    # 5. Cleanup
+    # The baseline already covers the unfiltered state, so clearing the filter
+    # needs no second find_work_units run to confirm it.
+    logger.info("[SCENARIO 4] Cleanup (Clearing Filter)")
+    set_idd_filter(table_name, None)